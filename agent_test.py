@@ -3,10 +3,18 @@ tests to run and debug your minimax and alphabeta agents locally.  The test
 cases used by the project assistant are not public.
 """
 
+import gc
+import io
+import json
+import os
+import random
+import tempfile
+import time
 import unittest
 
 import isolation
 import game_agent
+import sample_players
 
 from importlib import reload
 
@@ -20,6 +28,646 @@ class IsolationTest(unittest.TestCase):
         self.player2 = "Player2"
         self.game = isolation.Board(self.player1, self.player2)
 
+    def test_knight_moves_from_bitboard(self):
+        """Legal moves are the open in-bounds knight moves of each player"""
+        self.game.apply_move((0, 0))
+        self.game.apply_move((2, 1))
+        self.assertEqual(sorted(self.game.get_legal_moves()), [(1, 2)])
+        self.assertEqual(sorted(self.game.get_legal_moves(self.player2)),
+                         [(0, 2), (1, 3), (3, 3), (4, 0), (4, 2)])
+        self.assertEqual(len(self.game.get_blank_spaces()), 47)
+        self.assertFalse(self.game.move_is_legal((2, 1)))
+        self.assertFalse(self.game.move_is_legal((7, 0)))
+
+    def test_push_pop_restores_state(self):
+        """pop_move() undoes push_move() exactly"""
+        self.game.apply_move((2, 3))
+        before = self.game.to_string()
+        self.game.push_move((0, 5))
+        self.game.push_move((4, 4))
+        self.assertEqual(self.game.pop_move(), (4, 4))
+        self.assertEqual(self.game.pop_move(), (0, 5))
+        self.assertEqual(self.game.to_string(), before)
+        self.assertEqual(self.game.active_player, self.player2)
+        self.assertEqual(self.game.move_count, 1)
+        self.assertIsNone(self.game.get_player_location(self.player2))
+        self.assertRaises(RuntimeError, self.game.pop_move)
+
+    def test_board_hash_and_equality(self):
+        """Equal states hash equal; occupied cells, locations and side differ"""
+        moves = [(0, 0), (6, 6), (1, 2), (4, 5), (3, 3)]
+        a, b = self.game.copy(), self.game.copy()
+        for move in moves:
+            a.apply_move(move)
+        for move in moves[:-1]:
+            b.apply_move(move)
+        self.assertNotEqual(a, b)
+        b.push_move(moves[-1])
+        self.assertEqual(a, b)
+        self.assertEqual(hash(a), hash(b))
+        self.assertEqual(len({a, b, a.copy()}), 1)
+        b = self.game.copy()
+        for move in [(0, 0), (4, 5), (1, 2), (6, 6), (3, 3)]:
+            b.apply_move(move)
+        self.assertNotEqual(a, b)
+        self.assertNotEqual(hash(a), hash(b))
+
+    def test_move_order_policies(self):
+        """Seeded and deterministic move orders are reproducible"""
+        def moves(**kwargs):
+            game = isolation.Board(self.player1, self.player2, **kwargs)
+            game.apply_move((3, 3))
+            game.apply_move((0, 0))
+            return [game.get_legal_moves() for _ in range(5)]
+
+        self.assertEqual(moves(seed=7), moves(seed=7))
+        fixed = moves(move_order=isolation.Board.DETERMINISTIC)
+        self.assertEqual(fixed[0], [(1, 2), (1, 4), (2, 1), (2, 5),
+                                    (4, 1), (4, 5), (5, 2), (5, 4)])
+        self.assertEqual(moves(move_order=sorted)[0], sorted(fixed[0]))
+        self.assertRaises(ValueError, isolation.Board, self.player1,
+                          self.player2, move_order="sorted")
+
+    def test_count_legal_moves_with_tracked_mobility(self):
+        """Tracked mobility counts agree with the generated move lists"""
+        game = isolation.Board(self.player1, self.player2, track_mobility=True)
+        self.assertEqual(game.count_legal_moves(), 49)
+        for move in [(3, 3), (2, 1), (1, 5), (0, 3), (3, 4)]:
+            game.push_move(move)
+            for player in (self.player1, self.player2):
+                self.assertEqual(game.count_legal_moves(player),
+                                 len(game.get_legal_moves(player)))
+        for _ in range(5):
+            game.pop_move()
+        self.assertEqual(game.count_legal_moves(), 49)
+
+    def test_symmetry_reduction(self):
+        """Symmetric positions reduce to one move per equivalence class"""
+        self.assertEqual(len(self.game.symmetric_moves()), 10)
+        corners = []
+        for move in [(0, 0), (0, 6), (6, 0), (6, 6)]:
+            corners.append(self.game.forecast_move(move).canonical()[0])
+        self.assertEqual(len(set(corners)), 1)
+        board, transform = self.game.forecast_move((6, 0)).canonical()
+        self.assertEqual(self.game.transform_move((6, 0), transform),
+                         board.get_player_location(self.player1))
+        self.game.apply_move((3, 3))
+        self.assertEqual(len(self.game.symmetric_moves()), 9)
+        self.game.apply_move((2, 1))
+        self.assertEqual(len(self.game.symmetric_moves()),
+                         len(self.game.get_legal_moves()))
+
+    @unittest.skipIf(not hasattr(isolation, "BoardBatch"),
+                     "BoardBatch requires numpy")
+    def test_board_batch(self):
+        """BoardBatch plays seeded random games exactly like Board"""
+        for width, height in [(7, 7), (5, 4)]:
+            batch = isolation.BoardBatch(20, width, height, seed=1)
+            boards = [isolation.Board(self.player1, self.player2, width,
+                                      height) for _ in range(batch.num_games)]
+            players = (self.player1, self.player2)
+            while True:
+                legal = batch.legal_moves()
+                winners = batch.winners()
+                for i, board in enumerate(boards):
+                    self.assertEqual(
+                        sorted(batch.move_to_coords(move)
+                               for move in legal[i].nonzero()[0]),
+                        sorted(board.get_legal_moves()))
+                    winner = [player for player in players
+                              if board.is_winner(player)]
+                    self.assertEqual(
+                        [players[winners[i]]] if winners[i] >= 0 else [],
+                        winner)
+                    self.assertEqual(
+                        batch.to_board(i, self.player1, self.player2), board)
+                copy = isolation.BoardBatch.from_boards(boards)
+                for name in ["blocked", "locations", "initiative",
+                             "move_count"]:
+                    self.assertTrue((getattr(copy, name) ==
+                                     getattr(batch, name)).all())
+                moves = batch.random_moves()
+                if (moves < 0).all():
+                    break
+                batch.apply_moves(moves)
+                for board, move in zip(boards, moves):
+                    if move >= 0:
+                        board.apply_move(batch.move_to_coords(move))
+
+    def test_game_archive(self):
+        """Game records round-trip through an archive and the isoviz export"""
+        from isolation.records import GameArchive, GameRecord, export_isoviz
+        records = []
+        for width, height in [(7, 7), (5, 5), (4, 6)]:
+            players = (sample_players.RandomPlayer(),
+                       sample_players.RandomPlayer())
+            game = isolation.Board(players[0], players[1], width, height)
+            opening = [(0, 0)]
+            game.apply_move(opening[0])
+            result = game.play()
+            records.append(GameRecord.from_play(game, ("Random1", "Random2"),
+                                                opening, result))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "games.isoa")
+            with GameArchive(path) as archive:
+                for i, record in enumerate(records):
+                    self.assertEqual(archive.append(record), i)
+                self.assertEqual(archive[0], records[0])
+            with GameArchive(path) as archive:
+                self.assertEqual(len(archive), len(records))
+                for i, record in enumerate(records):
+                    self.assertEqual(archive[i], record)
+                self.assertEqual(archive[-1], records[-1])
+                self.assertRaises(IndexError, archive.__getitem__, 3)
+                out = io.StringIO()
+                export_isoviz(archive, [2, 0], out)
+        games = json.loads(out.getvalue())
+        self.assertEqual([game["moves"] for game in games],
+                         [[list(move) for move in records[i].moves]
+                          for i in (2, 0)])
+        self.assertEqual((games[0]["player1"], games[0]["player2"]),
+                         ("Random1", "Random2"))
+
+    def test_deadline_and_search_clock(self):
+        """Deadlines count down, and the sampled search clock times out
+        before the deadline after adapting its check interval"""
+        deadline = isolation.Deadline(100.)
+        self.assertTrue(deadline.per_move)
+        self.assertFalse(isolation.Deadline(100., per_move=False).per_move)
+        self.assertTrue(90. < deadline() <= 100.)
+        self.assertAlmostEqual(deadline.remaining_ns() / 1e6, deadline(),
+                               delta=1.)
+        self.assertEqual(isolation.Deadline(float("inf"))(), float("inf"))
+        self.assertLess(isolation.Deadline(-1.)(), 0.)
+
+        deadline = isolation.Deadline(50.)
+        clock = game_agent.SearchClock(deadline, 10.)
+        ticks = 0
+        with self.assertRaises(game_agent.SearchTimeout):
+            while True:
+                clock.tick()
+                ticks += 1
+        self.assertGreater(deadline(), 0.)
+        self.assertGreater(clock.interval, 1)
+        self.assertEqual(clock.nodes, ticks + 1)
+
+        # Any callable works, and is read against the threshold
+        times = iter([100., 20., 5.])
+        clock = game_agent.SearchClock(lambda: next(times), 10.)
+        clock.check()
+        clock.check()
+        self.assertRaises(game_agent.SearchTimeout, clock.check)
+
+    def test_partitioned_endgame(self):
+        """Separated players are detected and their paths solved exactly"""
+        game = isolation.Board(self.player1, self.player2, 5, 5)
+        self.assertFalse(game.is_partitioned())
+        for move in [(3, 3), (1, 0), (1, 4), (2, 2), (0, 2), (4, 3),
+                     (2, 1), (3, 1), (4, 2), (2, 3), (3, 4), (4, 4),
+                     (1, 3), (3, 2), (0, 1), (2, 4), (2, 0)]:
+            game.apply_move(move)
+            self.assertFalse(game.is_partitioned())
+        game.apply_move((0, 3))
+        self.assertTrue(game.is_partitioned())
+        self.assertEqual(len(game.reachable_spaces(self.player1)), 4)
+        solver = isolation.LongestPathSolver()
+        length, move = solver.solve(game)
+        self.assertEqual(length, 2)
+        self.assertIn(move, game.get_legal_moves())
+        self.assertEqual(solver.solve(game, self.player2)[0], 2)
+
+    def test_territory(self):
+        """Bitmask territory counts match a per-cell breadth-first search"""
+        def distances(game, player):
+            blank = set(game.get_blank_spaces())
+            start = game.get_player_location(player)
+            distance, frontier = {}, [start]
+            depth = 0
+            while frontier:
+                depth += 1
+                next_frontier = []
+                for r, c in frontier:
+                    for dr, dc in [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                                   (1, -2), (1, 2), (2, -1), (2, 1)]:
+                        cell = (r + dr, c + dc)
+                        if cell in blank and cell not in distance:
+                            distance[cell] = depth
+                            next_frontier.append(cell)
+                frontier = next_frontier
+            return distance
+
+        rng = random.Random(0)
+        inf = float("inf")
+        for _ in range(100):
+            game = isolation.Board(self.player1, self.player2,
+                                   rng.randint(5, 8), rng.randint(5, 8))
+            for _ in range(rng.randint(2, 30)):
+                moves = game.get_legal_moves()
+                if not moves:
+                    break
+                game.apply_move(rng.choice(moves))
+            own = distances(game, self.player1)
+            opp = distances(game, self.player2)
+            for max_depth in [1, 3, None]:
+                limit = inf if max_depth is None else max_depth
+                expected = (
+                    sum(d <= limit for d in own.values()),
+                    sum(d <= limit for d in opp.values()),
+                    sum(d <= limit and d < opp.get(cell, inf)
+                        for cell, d in own.items()),
+                    sum(d <= limit and d < own.get(cell, inf)
+                        for cell, d in opp.items()))
+                self.assertEqual(tuple(sample_players.territory(
+                    game, self.player1, max_depth)), expected)
+
+        # A player without moves reaches nothing, and has lost on their turn
+        game = isolation.Board(self.player1, self.player2, 5, 5)
+        for move in [(3, 2), (2, 3), (4, 4), (0, 4)]:
+            game.apply_move(move)
+        self.assertEqual(game.get_legal_moves(), [])
+        self.assertEqual(sample_players.territory(game, self.player1)[0], 0)
+        self.assertEqual(sample_players.territory_score(game, self.player1),
+                         float("-inf"))
+        self.assertEqual(sample_players.territory_score(game, self.player2),
+                         float("inf"))
+
+    def test_transposition_table(self):
+        """Search results are stored by position and replaced by depth"""
+        table = game_agent.TranspositionTable(16)
+        table.store(5, 3, table.EXACT, 1.0, (0, 1))
+        table.store(21, 2, table.LOWER, 4.0, (1, 0))
+        self.assertEqual(table.probe(5)[1:5], (3, table.EXACT, 1.0, (0, 1)))
+        self.assertIsNone(table.probe(21))
+        table.new_search()
+        table.store(21, 2, table.LOWER, 4.0, (1, 0))
+        self.assertIsNone(table.probe(5))
+        self.assertEqual(table.probe(21)[4], (1, 0))
+
+        player = game_agent.AlphaBetaPlayer(tt_entries=1024)
+        game = isolation.Board(player, self.player2, 5, 5)
+        game.apply_move((2, 2))
+        game.apply_move((0, 0))
+        player.time_left = lambda: 1000.
+        player._start_clock()
+        move = player.alphabeta(game, 3)
+        self.assertIn(move, game.get_legal_moves())
+        self.assertEqual(player.tt.probe(game.hash())[4], move)
+
+    def test_move_ordering(self):
+        """Moves are ordered PV first, then table move, killers and history"""
+        ordering = game_agent.MoveOrdering()
+        ordering.start_iteration(2)
+        moves = [(0, 0), (0, 1), (1, 0), (1, 1), (2, 2)]
+        ordering.cutoff((1, 1), 1, 1, 3)
+        ordering.cutoff((1, 1), 2, 2, 0)
+        ordering.cutoff((2, 2), 1, 2, 0)
+        ordering.killers[1] = [(1, 0)]
+        self.assertEqual(ordering.order(moves, 1, (0, 1), (0, 0)),
+                         [(0, 1), (0, 0), (1, 0), (2, 2), (1, 1)])
+        stats = ordering.stats()
+        self.assertEqual((stats["cutoffs"], stats["nodes"]), (3, 1))
+        self.assertAlmostEqual(stats["first_move_rate"], 2 / 3)
+
+        # The PV of an expanded child is spliced in, but not left behind
+        # for a later sibling answered without expanding it
+        ordering.start_iteration(2)
+        ordering.order(moves, 0)
+        ordering.order(moves, 1)
+        ordering.update_pv(1, (2, 2), True)
+        ordering.update_pv(0, (0, 0), False)
+        self.assertEqual(ordering._pv_table[0], [(0, 0), (2, 2)])
+        ordering.update_pv(0, (1, 1), False)
+        ordering.finish_iteration()
+        self.assertEqual(ordering.pv, [(1, 1)])
+
+    def test_principal_variation_search(self):
+        """PVS and aspiration windows find the same score as alpha-beta"""
+        scores = []
+        for kwargs in [dict(), dict(pvs=True, move_ordering=True)]:
+            player = game_agent.AlphaBetaPlayer(**kwargs)
+            game = isolation.Board(player, self.player2, 5, 5)
+            for move in [(2, 2), (0, 0), (1, 4), (2, 1)]:
+                game.apply_move(move)
+            player.time_left = lambda: 1000.
+            player._start_clock()
+            player.alphabeta(game, 4)
+            scores.append(player.root_score)
+        self.assertEqual(scores[0], scores[1])
+        player.alphabeta(game, 4, scores[0] + 1, scores[0] + 2)
+        self.assertLessEqual(player.root_score, scores[0] + 1)
+        player.alphabeta(game, 4, scores[0] - 2, scores[0] - 1)
+        self.assertGreaterEqual(player.root_score, scores[0] - 1)
+
+    def test_opponent_turn_hooks(self):
+        """play() tells the waiting player when the opponent's turn starts
+        and ends, and a pondering player keeps a legal move"""
+        player = game_agent.AlphaBetaPlayer(
+            ponder=game_agent.AlphaBetaPlayer.PONDER_ALL)
+        opponent = game_agent.AlphaBetaPlayer()
+        calls = []
+        started, ended = player.opponent_turn_started, player.opponent_turn_ended
+        player.opponent_turn_started = lambda game: (
+            calls.append(game.active_player), started(game))
+        player.opponent_turn_ended = lambda move: (
+            calls.append(move), ended(move))
+        game = isolation.Board(opponent, player, 5, 5)
+        winner, history, _ = game.play(time_limit=50)
+        self.assertEqual(calls[0], opponent)
+        self.assertEqual(calls[1], tuple(history[0]))
+        self.assertIsNone(player._ponder_thread)
+
+    def test_shared_transposition_table(self):
+        """Tables attached to one shared memory block see the same entries"""
+        table = game_agent.SharedTranspositionTable(64)
+        other = game_agent.SharedTranspositionTable(64, name=table.name)
+        try:
+            table.store(12345, 4, table.LOWER, -2.5, (3, 4))
+            self.assertEqual(other.probe(12345)[1:5],
+                             (4, table.LOWER, -2.5, (3, 4)))
+            other.set_perspective(1)
+            self.assertIsNone(other.probe(12345))
+        finally:
+            other.close()
+            table.close(unlink=True)
+
+    def test_lazy_smp_player(self):
+        """A Lazy SMP player starts its helpers before its first move and
+        returns a legal move in time"""
+        from unittest import mock
+        # Force a helper even on one core, where it slows the clock checks
+        with mock.patch("os.cpu_count", return_value=2):
+            player = game_agent.AlphaBetaPlayer(workers=1, timeout=30.)
+        try:
+            self.assertEqual(len(player._helpers), 1)
+            self.assertTrue(player._helpers[0].is_alive())
+            game = isolation.Board(player, self.player2)
+            game.apply_move((3, 3))
+            game.apply_move((0, 0))
+            for _ in range(2):
+                deadline = isolation.Deadline(100.)
+                move = player.get_move(game, deadline)
+                self.assertGreater(deadline(), 0.)
+                self.assertIn(move, game.get_legal_moves())
+                game.apply_move(move)
+                game.apply_move(game.get_legal_moves()[0])
+        finally:
+            player.close()
+        self.assertEqual(player._helpers, [])
+        # A closed player still searches, without helpers
+        self.assertIn(player.get_move(game, isolation.Deadline(100.)),
+                      game.get_legal_moves())
+
+    def test_time_manager(self):
+        """Iterations are not started if predicted to overrun, and stable
+        moves end the search early with a chess clock"""
+        manager = game_agent.TimeManager(lambda: 110., 10.)
+        self.assertEqual(manager.hard, 100.)
+        manager.record(100, 1., (0, 0), 0.)
+        manager.record(400, 4., (0, 0), 1.)
+        self.assertAlmostEqual(manager.branching_factor(), 4.)
+        self.assertAlmostEqual(manager.predicted_time(), 16.)
+        self.assertTrue(manager.should_continue())
+        manager.times[-1] = 60.
+        self.assertFalse(manager.should_continue())
+
+        manager = game_agent.TimeManager(lambda: 1010., 10., moves_to_go=10)
+        self.assertEqual((manager.soft, manager.hard), (100., 400.))
+        for _ in range(game_agent.TimeManager.STABLE_ITERATIONS):
+            manager.record(10, 0., (1, 2), 0.)
+        manager.start_ns -= 30e6
+        self.assertFalse(manager.should_continue())
+
+        # The caller's clock stays the hard stop, even if it is not the
+        # wall clock
+        clock = [1010.]
+        manager = game_agent.TimeManager(lambda: clock[0], 10.)
+        self.assertGreater(manager.deadline(), 900.)
+        clock[0] = 5.
+        self.assertEqual(manager.deadline(), 5.)
+        player = game_agent.AlphaBetaPlayer(time_management=True)
+        game = isolation.Board(player, self.player2)
+        game.apply_move((3, 3))
+        game.apply_move((2, 1))
+        calls = []
+
+        def time_left():
+            calls.append(None)
+            return 1000. if len(calls) < 20 else 0.
+        start = time.perf_counter()
+        self.assertIn(player.get_move(game, time_left), game.get_legal_moves())
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_lost_position_returns_legal_move(self):
+        """A player whose every move loses still returns a legal move"""
+        player = game_agent.AlphaBetaPlayer()
+        game = isolation.Board(player, self.player2, 5, 5)
+        for move in [(0, 0), (1, 4), (1, 2), (2, 2), (2, 4), (4, 3), (3, 2),
+                     (3, 1), (1, 1), (2, 3)]:
+            game.apply_move(move)
+        legal_moves = game.get_legal_moves()
+        player.time_left = lambda: 1000.
+        player._start_clock()
+        self.assertIn(player.alphabeta(game, 4), legal_moves)
+        self.assertEqual(player.root_score, float("-inf"))
+        move = player.get_move(game.copy(), lambda: 1000.)
+        self.assertIn(move, legal_moves)
+
+    def test_search_stats(self):
+        """Each move records the search's node, leaf and cutoff counts"""
+        for player in [game_agent.MinimaxPlayer(),
+                       game_agent.AlphaBetaPlayer(time_management=False)]:
+            game = isolation.Board(player, self.player2, 5, 5)
+            game.apply_move((2, 2))
+            game.apply_move((0, 0))
+            player.get_move(game, isolation.Deadline(50))
+            stats = player.move_stats[-1]
+            self.assertEqual(len(player.move_stats), 1)
+            self.assertGreater(stats.nodes, 0)
+            self.assertGreater(stats.leaf_evals, 0)
+            self.assertGreaterEqual(stats.depth, 3)
+            self.assertGreater(stats.nodes_per_sec, 0)
+        self.assertGreater(stats.cutoffs, 0)
+
+    def test_mcts_player(self):
+        """MCTS plays legal moves and keeps the subtree of the moves played"""
+        player = game_agent.MCTSPlayer(max_simulations=300, seed=0)
+        game = isolation.Board(player, self.player2, 5, 5)
+        game.apply_move((2, 2))
+        game.apply_move((0, 0))
+        move = player.get_move(game, lambda: 1000.)
+        self.assertIn(move, game.get_legal_moves())
+        self.assertEqual(player._root.visits, 300)
+        self.assertEqual(player.move_stats[-1].leaf_evals, 300)
+        coords = game._geometry.coords
+        child = next(child for child in player._root.children
+                     if coords[child.move] == move)
+        reply = max(child.children, key=lambda node: node.visits)
+        game.apply_move(move)
+        game.apply_move(coords[reply.move])
+        player.max_simulations = 0
+        player.get_move(game, lambda: 1000.)
+        self.assertIs(player._root, reply)
+        self.assertGreater(reply.visits, 0)
+
+        # The root is at depth 0
+        player = game_agent.MCTSPlayer(max_simulations=1, seed=0)
+        game = isolation.Board(player, self.player2)
+        player.get_move(game, lambda: 1000.)
+        self.assertEqual(player.move_stats[-1].depth, 1)
+
+    def test_mcts_player_returns_in_time(self):
+        """MCTS returns before the deadline with a large tree, which neither
+        garbage collection nor freeing old subtrees may delay"""
+        player = game_agent.MCTSPlayer(max_simulations=30000, seed=0)
+        game = isolation.Board(player, self.player2)
+        game.apply_move((3, 3))
+        game.apply_move((0, 0))
+        thresholds = gc.get_threshold()
+        player.get_move(game, lambda: 1e6)
+        player.max_simulations = None
+        for _ in range(6):
+            deadline = isolation.Deadline(50.)
+            move = player.get_move(game, deadline)
+            self.assertGreater(deadline(), 0.)
+            self.assertIn(move, game.get_legal_moves())
+            game.apply_move(move)
+            replies = game.get_legal_moves()
+            if not replies:
+                break
+            game.apply_move(replies[0])
+        # The search leaves the garbage collector as it found it
+        self.assertEqual(gc.get_threshold(), thresholds)
+        self.assertEqual(gc.get_freeze_count(), 0)
+
+    def test_opening_book(self):
+        """Book moves are found for every symmetric variant of a position"""
+        from isolation.book import OpeningBook, write_book
+
+        game = isolation.Board(self.player1, self.player2, 5, 5)
+        game.apply_move((0, 0))
+        board, _ = game.canonical()
+        move = board.get_legal_moves()[0]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "book.isob")
+            write_book(path, 5, 5, 2, [(board.hash(), move, 3)])
+            with OpeningBook(path) as book:
+                self.assertEqual(len(book), 1)
+                for corner in [(0, 0), (0, 4), (4, 0), (4, 4)]:
+                    game = isolation.Board(self.player1, self.player2, 5, 5)
+                    game.apply_move(corner)
+                    board, transform = game.canonical()
+                    self.assertEqual(book.lookup(game), game.transform_move(
+                        move, transform, inverse=True))
+                self.assertIsNone(book.lookup(isolation.Board(
+                    self.player1, self.player2, 5, 5)))
+
+            with game_agent.AlphaBetaPlayer(opening_book=path) as player:
+                game = isolation.Board(self.player2, player, 5, 5)
+                game.apply_move((4, 4))
+                self.assertEqual(player.get_move(game, lambda: 1000.),
+                                 player.book.lookup(game))
+                self.assertEqual(player.move_stats[-1].nodes, 0)
+            self.assertIsNone(player.book._map)
+
+    def test_score_cache(self):
+        """Cached scores are reused per position and player, and the least
+        recently used score is evicted"""
+        calls = []
+        score_fn = game_agent.ScoreCache(
+            lambda game, player: calls.append(player) or float(len(calls)),
+            max_entries=2)
+        positions = []
+        for move in [(0, 0), (1, 2), (2, 4)]:
+            self.game.apply_move(move)
+            positions.append(self.game.copy())
+        self.assertEqual(score_fn(positions[0], self.player1), 1.)
+        self.assertEqual(score_fn(positions[0], self.player2), 2.)
+        self.assertEqual(score_fn(positions[0], self.player1), 1.)
+        self.assertEqual(score_fn(positions[1], self.player1), 3.)
+        self.assertEqual(score_fn(positions[0], self.player1), 1.)
+        self.assertEqual(score_fn(positions[0], self.player2), 4.)
+        self.assertEqual((score_fn.hits, score_fn.misses, len(score_fn)),
+                         (2, 4, 2))
+        self.assertEqual(score_fn.__name__, "<lambda>")
+
+    def test_batched_child_scores(self):
+        """Batched child scores equal scoring every child board"""
+        for move in [(3, 3), (2, 1), (1, 5), (0, 3), (3, 4)]:
+            self.game.apply_move(move)
+        moves = self.game.get_legal_moves()
+        own, opp = self.game.count_child_moves(moves)
+        for score_fn in [sample_players.open_move_score,
+                         sample_players.improved_score,
+                         sample_players.center_score, game_agent.custom_score,
+                         game_agent.custom_score_2, game_agent.custom_score_3]:
+            for player in (self.player1, self.player2):
+                self.assertEqual(
+                    score_fn.score_children(self.game, player, moves),
+                    [score_fn(self.game.forecast_move(move), player)
+                     for move in moves])
+        for move, own_count, opp_count in zip(moves, own, opp):
+            child = self.game.forecast_move(move)
+            self.assertEqual((own_count, opp_count),
+                             (child.count_legal_moves(self.player2),
+                              child.count_legal_moves(self.player1)))
+
+    def test_perft_and_differential(self):
+        """Board matches the perft counts and the reference implementation"""
+        from isolation.perft import PERFT_COUNTS, differential, perft
+        from isolation.reference import Board as ReferenceBoard
+        for board_class in (isolation.Board, ReferenceBoard):
+            for size in [(5, 5), (7, 7)]:
+                board = board_class(self.player1, self.player2, *size)
+                self.assertEqual([perft(board, depth) for depth in range(4)],
+                                 list(PERFT_COUNTS[size][:4]))
+        self.assertGreater(differential(num_games=5, width=5, height=5), 5)
+
+        class Cheater(isolation.Board):
+            def get_legal_moves(self, player=None):
+                return super().get_legal_moves(player)[:1]
+        with self.assertRaises(AssertionError):
+            differential(Cheater, num_games=1)
+
+    def test_spsa_tuner(self):
+        """SPSA steps toward better weights and resumes from a checkpoint"""
+        import pickle
+        from tune import SPSATuner
+        score_fn = pickle.loads(pickle.dumps(
+            game_agent.WeightedScore(1., 2., .5)))
+        for move in [(3, 3), (2, 1), (1, 5), (0, 3), (3, 4)]:
+            self.game.apply_move(move)
+        moves = self.game.get_legal_moves()
+        for player in (self.player1, self.player2):
+            self.assertEqual(score_fn.score_children(self.game, player, moves),
+                             [score_fn(self.game.forecast_move(move), player)
+                              for move in moves])
+
+        # The custom scores are only points of the weight space for the
+        # active player
+        for weights, custom in [((1., 1.5, 0.), game_agent.custom_score),
+                                ((2.5, 1., 0.), game_agent.custom_score_3)]:
+            weighted = game_agent.WeightedScore(*weights)
+            self.assertEqual(weighted(self.game, self.game.active_player),
+                             custom(self.game, self.game.active_player))
+            self.assertNotEqual(
+                weighted(self.game, self.game.inactive_player),
+                custom(self.game, self.game.inactive_player))
+
+        def evaluate(plus, minus, rng):
+            return -abs(plus[0] - 3.), -abs(minus[0] - 3.)
+        tuner = SPSATuner([1., 1.], seed=3)
+        for _ in range(20):
+            tuner.step(evaluate)
+        self.assertLess(abs(tuner.weights[0] - 3.), 1.)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tune.json")
+            tuner.save(path)
+            resumed = SPSATuner.load(path)
+        self.assertEqual(vars(resumed), vars(tuner))
+        resumed.step(evaluate)
+        tuner.step(evaluate)
+        self.assertEqual(resumed.weights, tuner.weights)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,180 @@
+"""Measure the cost of the isolation.Board engine.
+
+Run `python benchmark.py` to report every benchmark, or name the ones to run
+(e.g., `python benchmark.py memory`); see `python benchmark.py --help` for
+the available options.
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+
+from isolation import Board, Deadline
+
+
+def random_positions(num_positions, width=7, height=7, seed=0):
+    """Return `num_positions` (board, move) pairs taken at random plies of
+    seeded random games, where `move` is a legal move on `board`.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < num_positions:
+        game = Board("Player1", "Player2", width, height, seed=rng.random())
+        while len(positions) < num_positions:
+            legal_moves = game.get_legal_moves()
+            if not legal_moves:
+                break
+            positions.append((game.copy(), rng.choice(legal_moves)))
+            game.apply_move(positions[-1][1])
+    return positions
+
+
+def board_memory(num_boards=10000, width=7, height=7):
+    """Return the average number of bytes allocated for each search node
+    (a Board created by forecast_move) held in memory, as measured by
+    tracemalloc.
+    """
+    positions = random_positions(num_boards, width, height)
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    children = [board.forecast_move(move) for board, move in positions]
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # The list holding the children is not part of the per-board cost
+    return (end - start - sys.getsizeof(children)) / len(children)
+
+
+def batch_playouts(num_games=10000, width=7, height=7):
+    """Return the number of plies per second played by random playouts of
+    `num_games` simultaneous games in an `isolation.BoardBatch`.
+    """
+    from isolation import BoardBatch
+
+    batch = BoardBatch(num_games, width, height, seed=0)
+    start = timeit.default_timer()
+    batch.playout()
+    elapsed = timeit.default_timer() - start
+    return batch.move_count.sum() / elapsed
+
+
+def board_playouts(num_games=200, width=7, height=7):
+    """Return the number of plies per second played by random playouts of
+    `num_games` games, one `isolation.Board` at a time.
+    """
+    rng = random.Random(0)
+    plies = 0
+    start = timeit.default_timer()
+    for _ in range(num_games):
+        game = Board("Player1", "Player2", width, height)
+        legal_moves = game.get_legal_moves()
+        while legal_moves:
+            game.apply_move(rng.choice(legal_moves))
+            legal_moves = game.get_legal_moves()
+        plies += game.move_count
+    return plies / (timeit.default_timer() - start)
+
+
+def search_positions(player, num_positions, width=7, height=7, seed=0):
+    """Yield `num_positions` boards where `player` is to move, taken after
+    2 to 16 seeded random plies and before the players are separated.
+    """
+    rng = random.Random(seed)
+    count = 0
+    while count < num_positions:
+        game = Board(player, "Opponent", width, height, seed=rng.random())
+        for _ in range(2 * rng.randint(1, 8)):
+            legal_moves = game.get_legal_moves()
+            if not legal_moves:
+                break
+            game.apply_move(rng.choice(legal_moves))
+        if (game.active_player != player or not game.get_legal_moves() or
+                game.is_partitioned()):
+            continue
+        count += 1
+        yield game
+
+
+def smp_depth(workers, num_positions=20, time_limit=200, width=7, height=7):
+    """Return the mean depth completed per move by an `AlphaBetaPlayer`
+    with `workers` Lazy SMP helper processes, searching seeded random
+    positions for `time_limit` milliseconds each.
+    """
+    from game_agent import AlphaBetaPlayer
+
+    player = AlphaBetaPlayer(workers=workers)
+    depths = []
+    try:
+        for game in search_positions(player, num_positions, width, height):
+            player.get_move(game, Deadline(time_limit))
+            depths.append(player.completed_depth)
+    finally:
+        player.close()
+    return sum(depths) / len(depths)
+
+
+def search_rate(player, num_positions=20, time_limit=200, width=7, height=7):
+    """Return the mean nodes per second of `player` (simulations per second
+    for an `MCTSPlayer`), searching seeded random positions for
+    `time_limit` milliseconds each.
+    """
+    del player.move_stats[:]
+    for game in search_positions(player, num_positions, width, height):
+        player.get_move(game, Deadline(time_limit))
+    stats = player.move_stats
+    return sum(move.nodes_per_sec for move in stats) / len(stats)
+
+
+def main():
+    benchmarks = ["memory", "playouts", "search", "smp"]
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("benchmarks", nargs="*", metavar="benchmark",
+                        help="one of {} (default: all)".format(
+                            ", ".join(benchmarks)))
+    parser.add_argument("-n", "--num-boards", type=int, default=10000,
+                        help="number of boards or games to measure")
+    parser.add_argument("--width", type=int, default=7)
+    parser.add_argument("--height", type=int, default=7)
+    args = parser.parse_args()
+    selected = args.benchmarks or benchmarks
+    for name in selected:
+        if name not in benchmarks:
+            parser.error("unknown benchmark: {}".format(name))
+    size = "{}x{}".format(args.width, args.height)
+
+    if "memory" in selected:
+        memory = board_memory(args.num_boards, args.width, args.height)
+        print("Board memory: {:.1f} bytes per board ({}, {} boards)".format(
+            memory, size, args.num_boards))
+    if "playouts" in selected:
+        rate = board_playouts(width=args.width, height=args.height)
+        print("Board random playouts: {:,.0f} plies/sec ({})".format(
+            rate, size))
+        rate = batch_playouts(args.num_boards, args.width, args.height)
+        print("BoardBatch random playouts: {:,.0f} plies/sec ({}, {} "
+              "games)".format(rate, size, args.num_boards))
+    if "search" in selected:
+        from game_agent import AlphaBetaPlayer, MCTSPlayer
+
+        rate = search_rate(AlphaBetaPlayer(), width=args.width,
+                           height=args.height)
+        print("AlphaBetaPlayer search: {:,.0f} nodes/sec ({})".format(
+            rate, size))
+        rate = search_rate(MCTSPlayer(), width=args.width, height=args.height)
+        print("MCTSPlayer search: {:,.0f} simulations/sec ({})".format(
+            rate, size))
+    if "smp" in selected:
+        # Doubling helper counts up to one per core besides the main process
+        workers = 0
+        while True:
+            depth = smp_depth(workers, width=args.width, height=args.height)
+            print("Lazy SMP with {} helpers: {:.2f} plies per move "
+                  "({})".format(workers, depth, size))
+            if workers >= (os.cpu_count() or 1) - 1:
+                break
+            workers = min(max(1, 2 * workers), (os.cpu_count() or 1) - 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Build an opening book (see `isolation.book`) by searching every position of
+the first plies of the game, up to symmetry, with a deep alpha-beta search.
+
+The positions are searched in parallel by a pool of worker processes, e.g.:
+
+    python build_book.py book.isob --plies 3 --time 2000 --processes 4
+
+Pass the book to `AlphaBetaPlayer(opening_book="book.isob")` to play it.
+"""
+import argparse
+import multiprocessing
+import os
+import time
+
+from isolation import Board, Deadline
+from isolation.book import opening_positions, write_book
+
+_player = None
+
+
+def _init_worker(tt_entries):
+    """Create the search player of a worker process."""
+    global _player
+    from game_agent import AlphaBetaPlayer
+
+    _player = AlphaBetaPlayer(symmetric_root=True, tt_entries=tt_entries,
+                              move_ordering=True)
+
+
+def _search_position(job):
+    """Search the canonical form of the position reached by a sequence of
+    moves, and return its (hash, best move, depth completed).
+    """
+    moves, width, height, time_limit = job
+    players = (_player, "Opponent") if len(moves) % 2 == 0 else \
+        ("Opponent", _player)
+    game = Board(players[0], players[1], width, height)
+    for move in moves:
+        game.apply_move(move)
+    board, _ = game.canonical()
+    move = _player.get_move(board, Deadline(time_limit))
+    return board.hash(), move, _player.completed_depth
+
+
+def build_book(path, width=7, height=7, plies=3, time_limit=1000,
+               processes=None, tt_entries=1 << 20, verbose=False):
+    """Search every opening position of the first `plies` plies for
+    `time_limit` milliseconds with `processes` worker processes (one per
+    CPU core if None), and write the book to `path`.
+    """
+    jobs = [(moves, width, height, time_limit)
+            for moves in opening_positions(width, height, plies)]
+    start = time.perf_counter()
+    entries = []
+    with multiprocessing.Pool(processes, _init_worker, (tt_entries,)) as pool:
+        for entry in pool.imap_unordered(_search_position, jobs):
+            entries.append(entry)
+            if verbose:
+                print("\r{}/{} positions ({:.0f}s)".format(
+                    len(entries), len(jobs), time.perf_counter() - start),
+                    end="", flush=True)
+    if verbose:
+        print()
+    write_book(path, width, height, plies, entries)
+    return len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="path of the book file to write")
+    parser.add_argument("--plies", type=int, default=3,
+                        help="number of plies from the start of the game")
+    parser.add_argument("--time", type=int, default=1000,
+                        help="search time per position in milliseconds")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--width", type=int, default=7)
+    parser.add_argument("--height", type=int, default=7)
+    args = parser.parse_args()
+    count = build_book(args.path, args.width, args.height, args.plies,
+                       args.time, args.processes, verbose=True)
+    print("Wrote {} positions to {}".format(count, args.path))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,26 @@ test your agent's strength against a set of known agents using tournament.py
 and include the results in your report.
 """
 
+import functools
+import gc
+import math
+import multiprocessing
+import os
+import queue
 import random
+import threading
+import time
+import weakref
+
+from collections import OrderedDict, namedtuple
+from multiprocessing import shared_memory
+
+from isolation import Board, Deadline, LongestPathSolver
+from isolation.book import OpeningBook
+from isolation.isolation import popcount
+
+SearchStats = namedtuple("SearchStats", ["nodes", "leaf_evals", "cutoffs",
+                                         "depth", "time", "nodes_per_sec"])
 
 
 class SearchTimeout(Exception):
@@ -11,6 +30,485 @@ class SearchTimeout(Exception):
     pass
 
 
+class SearchClock(object):
+    """Raise SearchTimeout when a search runs out of time, reading the clock
+    only every `interval` nodes instead of at every node.
+
+    The interval adapts to the measured node rate so that the clock is read
+    about once per `period` milliseconds, and never less often than needed
+    to notice the moment the time left drops below `threshold`.
+
+    Parameters
+    ----------
+    time_left : callable
+        A function that returns the number of milliseconds left in the
+        current turn. An `isolation.Deadline` is read through its cheaper
+        `remaining_ns()` method.
+
+    threshold : float
+        Time remaining (in milliseconds) when the search is aborted.
+
+    period : float (optional)
+        The target time (in milliseconds) between two clock readings;
+        defaults to a quarter of `threshold`.
+
+    The search also counts its leaf evaluations in `leaves` and its beta
+    cutoffs in `cutoffs`.
+    """
+    MAX_INTERVAL = 4096
+
+    def __init__(self, time_left, threshold, period=None):
+        self.time_left = time_left
+        self.threshold = threshold
+        self.period = threshold / 4. if period is None else period
+        self._remaining_ns = getattr(time_left, "remaining_ns", None)
+        self._last_check_ns = None
+        # The node count at which the clock is read next
+        self._check_nodes = 1
+        self.interval = 1
+        self.countdown = 1
+        self.leaves = 0
+        self.cutoffs = 0
+
+    @property
+    def nodes(self):
+        """The number of nodes counted so far."""
+        return self._check_nodes - self.countdown
+
+    def counts(self):
+        """Return the (nodes, leaf evaluations, cutoffs) counted so far."""
+        return self.nodes, self.leaves, self.cutoffs
+
+    def stats(self, start_counts, depth, start_ns):
+        """Return the `SearchStats` of a search that started with the counts
+        `start_counts` at `time.perf_counter_ns()` `start_ns` and completed
+        `depth` plies.
+        """
+        elapsed = (time.perf_counter_ns() - start_ns) / 1e6
+        nodes, leaves, cutoffs = [count - start for count, start
+                                  in zip(self.counts(), start_counts)]
+        return SearchStats(nodes, leaves, cutoffs, depth, elapsed,
+                           nodes * 1e3 / elapsed if elapsed > 0 else 0.)
+
+    def tick(self):
+        """Count one search node and check the clock when due."""
+        self.countdown -= 1
+        if self.countdown <= 0:
+            self.check()
+
+    def check(self):
+        """Read the clock, raise SearchTimeout if the time left is below the
+        threshold, and pick the number of nodes until the next check.
+        """
+        if self._remaining_ns is not None:
+            remaining = self._remaining_ns() / 1e6
+        else:
+            remaining = self.time_left()
+        if remaining < self.threshold:
+            raise SearchTimeout()
+
+        now = time.perf_counter_ns()
+        if self._last_check_ns is not None and now > self._last_check_ns:
+            nodes_per_ms = self.interval * 1e6 / (now - self._last_check_ns)
+            budget = min(self.period, remaining - self.threshold)
+            self.interval = max(1, min(self.MAX_INTERVAL,
+                                       int(nodes_per_ms * budget)))
+        self._last_check_ns = now
+        self.countdown = self.interval
+        self._check_nodes += self.interval
+
+
+class TimeManager(object):
+    """Decide between the iterations of an iterative deepening search
+    whether to start another one.
+
+    Every completed iteration is recorded with its node count, and the
+    effective branching factor (the growth of the node count from one
+    iteration to the next) predicts how long the next iteration will take.
+    No iteration is started that is not expected to finish before the hard
+    limit, so the work of an aborted last iteration is rarely wasted. The
+    search also stops when the result of the game is decided and, with a
+    chess clock, at the soft limit or once the best move has not changed
+    for `STABLE_ITERATIONS` iterations and a quarter of the soft limit is
+    spent.
+
+    Iterations take between about half and twice their predicted time. With
+    a time limit per move, time saved is lost anyway, so an iteration is
+    only skipped if even `PER_MOVE_OPTIMISM` times its predicted time would
+    overrun, and stable moves do not end the search.
+
+    The search is given `deadline` as its `time_left`: the caller's
+    `time_left` is still read as the hard stop, so a caller whose clock is
+    not the wall clock keeps control of when the search ends.
+
+    Parameters
+    ----------
+    time_left : callable
+        A function that returns the number of milliseconds left.
+
+    threshold : float
+        Time (in milliseconds) to keep in reserve when the search returns.
+
+    moves_to_go : int (optional)
+        With a chess clock, the number of moves the time left must last
+        for; the soft limit is then an even share of the time left for each
+        move and the hard limit a few shares. With None, the time left is
+        for the current move only and both limits are the time left.
+    """
+    STABLE_ITERATIONS = 4
+    MAX_SHARES = 4
+    PER_MOVE_OPTIMISM = 0.5
+
+    def __init__(self, time_left, threshold, moves_to_go=None):
+        self.start_ns = time.perf_counter_ns()
+        remaining = time_left() - threshold
+        self.chess_clock = moves_to_go is not None
+        if moves_to_go is None:
+            self.soft = self.hard = remaining
+        else:
+            self.soft = remaining / max(1, moves_to_go)
+            self.hard = min(remaining, self.MAX_SHARES * self.soft)
+        self._time_left = time_left
+        self._hard_deadline = Deadline(self.hard + threshold)
+        self.nodes = []
+        self.times = []
+        self.best_moves = []
+        self.score = None
+
+    def deadline(self):
+        """Return the number of milliseconds left before the search must be
+        aborted: the earlier of the hard limit and the caller's time left.
+        """
+        return min(self._time_left(), self._hard_deadline())
+
+    def elapsed(self):
+        """Return the number of milliseconds since the search started."""
+        return (time.perf_counter_ns() - self.start_ns) / 1e6
+
+    def record(self, nodes, elapsed, best_move, score):
+        """Record an iteration that searched `nodes` nodes in `elapsed`
+        milliseconds and found `best_move` with `score`.
+        """
+        self.nodes.append(nodes)
+        self.times.append(elapsed)
+        self.best_moves.append(best_move)
+        self.score = score
+
+    def branching_factor(self):
+        """Return the effective branching factor of the last iterations, or
+        None before two iterations have completed.
+        """
+        nodes = self.nodes[-3:]
+        ratios = [b / a for a, b in zip(nodes, nodes[1:]) if a]
+        if not ratios:
+            return None
+        # Geometric mean, to damp the odd/even depth oscillation
+        product = 1.
+        for ratio in ratios:
+            product *= ratio
+        return max(1., product ** (1. / len(ratios)))
+
+    def predicted_time(self):
+        """Return the predicted duration in milliseconds of the next
+        iteration, or 0 before two iterations have completed.
+        """
+        factor = self.branching_factor()
+        return 0. if factor is None else self.times[-1] * factor
+
+    def is_stable(self):
+        """Return True if the last STABLE_ITERATIONS iterations found the
+        same best move.
+        """
+        moves = self.best_moves[-self.STABLE_ITERATIONS:]
+        return (len(moves) == self.STABLE_ITERATIONS and
+                all(move == moves[0] for move in moves))
+
+    def should_continue(self):
+        """Return True if the next iteration should be started."""
+        if self.score in (float("inf"), float("-inf")):
+            return False
+        elapsed = self.elapsed()
+        if elapsed >= self.soft:
+            return False
+        if (self.chess_clock and self.is_stable() and
+                elapsed >= self.soft / 4.):
+            return False
+        predicted = self.predicted_time()
+        if not self.chess_clock:
+            predicted *= self.PER_MOVE_OPTIMISM
+        return elapsed + predicted < self.hard
+
+
+class TranspositionTable(object):
+    """A fixed-size table of search results keyed by the Zobrist hash of a
+    position, so that positions reached through different move orders, in
+    earlier iterations or on earlier turns are not searched again.
+
+    Each entry holds (key, depth, flag, score, move, age). The slot of a
+    position is chosen by its key; a new result replaces the old one if the
+    slot is empty, holds the same position, was written during an earlier
+    search (age), or was searched to a smaller or equal depth.
+
+    Every slot is three 64-bit words in one flat buffer: the data (depth,
+    flag, move and age packed together), the score, and a check word equal
+    to key ^ data ^ score. An entry is only returned if its check word
+    matches, which also rejects entries torn by concurrent writers when the
+    buffer is shared (see `SharedTranspositionTable`). A flat buffer uses a
+    fraction of the memory of a list of tuples and leaves nothing for the
+    garbage collector to traverse (full collections over a large table of
+    tuples take long enough to make a player time out).
+
+    Parameters
+    ----------
+    max_entries : int (optional)
+        The number of slots in the table.
+    """
+    EXACT, LOWER, UPPER = 0, 1, 2
+    MAX_AGE = 0xFFFF
+    SLOT_SIZE = 24
+    # Keys of the second player's searches are salted so that each side's
+    # scores (from its own point of view) are kept apart
+    PERSPECTIVE_SALT = 0x5A5A5A5A5A5A5A5A
+
+    def __init__(self, max_entries=1 << 18):
+        self.max_entries = max_entries
+        self.age = 0
+        self.perspective = None
+        self._salt = 0
+        self._attach(bytearray(self.SLOT_SIZE * max_entries))
+
+    def __len__(self):
+        return sum(1 for data in self._words[1::3] if data)
+
+    def _attach(self, buffer):
+        """Use `buffer` (a writable buffer of SLOT_SIZE bytes per slot) as
+        the storage of the table.
+        """
+        self._buffer = buffer
+        self._words = memoryview(buffer).cast("Q")
+        self._scores = memoryview(buffer).cast("d")
+
+    def clear(self):
+        """Remove every entry from the table."""
+        self._buffer[:] = bytes(len(self._buffer))
+
+    def new_search(self):
+        """Mark the entries written so far as belonging to earlier searches,
+        so they are the first to be replaced.
+        """
+        self.age = (self.age + 1) & TranspositionTable.MAX_AGE
+
+    def set_perspective(self, perspective):
+        """Scores are stored from the searching player's point of view, so
+        entries are keyed by that player's side (0 for player 1, 1 for
+        player 2) as well as by position.
+        """
+        self.perspective = perspective
+        self._salt = TranspositionTable.PERSPECTIVE_SALT if perspective else 0
+
+    def probe(self, key):
+        """Return the (key, depth, flag, score, move, age) entry stored for
+        the position with hash `key`, or None.
+        """
+        key ^= self._salt
+        base = 3 * (key % self.max_entries)
+        words = self._words
+        data = words[base + 1]
+        score_bits = words[base + 2]
+        if not data or words[base] ^ data ^ score_bits != key:
+            return None
+        move = (data >> 10 & 0x1FFFF) - 1
+        return (key ^ self._salt, data & 0xFF, data >> 8 & 3,
+                self._scores[base + 2],
+                divmod(move, 256) if move >= 0 else None, data >> 27)
+
+    def store(self, key, depth, flag, score, move):
+        """Store the result of searching the position with hash `key` to
+        `depth` plies, subject to the replacement policy.
+        """
+        key ^= self._salt
+        base = 3 * (key % self.max_entries)
+        words = self._words
+        data = words[base + 1]
+        if (data and depth < data & 0xFF and data >> 27 == self.age and
+                words[base] ^ data ^ words[base + 2] != key):
+            return
+        code = move[0] * 256 + move[1] if move is not None and move[0] >= 0 else -1
+        data = depth | flag << 8 | (code + 1) << 10 | self.age << 27
+        self._scores[base + 2] = score
+        words[base + 1] = data
+        words[base] = key ^ data ^ words[base + 2]
+
+    @staticmethod
+    def bound(score, alpha, beta):
+        """Return the flag for a score found with the window (alpha, beta):
+        UPPER if it failed low, LOWER if it failed high, EXACT otherwise.
+        """
+        if score <= alpha:
+            return TranspositionTable.UPPER
+        if score >= beta:
+            return TranspositionTable.LOWER
+        return TranspositionTable.EXACT
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """A `TranspositionTable` stored in a `multiprocessing.shared_memory`
+    block, so that several processes can search with the same table.
+
+    Writers do not lock: an entry torn by concurrent writes fails its check
+    word and is ignored (see `TranspositionTable`).
+
+    Parameters
+    ----------
+    max_entries : int (optional)
+        The number of slots in the table.
+
+    name : str (optional)
+        The name of the shared memory block of an existing table to attach
+        to; a new block is created if None.
+    """
+
+    def __init__(self, max_entries=1 << 18, name=None):
+        self.max_entries = max_entries
+        self.age = 0
+        self.perspective = None
+        self._salt = 0
+        self._shm = shared_memory.SharedMemory(
+            name=name, create=name is None,
+            size=self.SLOT_SIZE * max_entries)
+        self.name = self._shm.name
+        self._attach(self._shm.buf[:self.SLOT_SIZE * max_entries])
+
+    def close(self, unlink=False):
+        """Detach from the shared memory block, and destroy it if `unlink`
+        is True (in the process that created it).
+        """
+        self._words.release()
+        self._scores.release()
+        self._buffer.release()
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+
+
+class MoveOrdering(object):
+    """Order the moves of an alpha-beta search so that cutoffs happen as
+    early as possible: first the move of the principal variation (PV) found
+    by the previous iteration, then the best move from the transposition
+    table, then the killer moves of the ply (moves that caused a cutoff in a
+    sibling node), and finally the remaining moves by their history score
+    (the sum of depth**2 over the cutoffs each move caused).
+
+    The search reports every cutoff with `cutoff()`, which also keeps
+    statistics on how early the cutoffs happen (see `stats()`).
+
+    Parameters
+    ----------
+    num_killers : int (optional)
+        The number of killer moves remembered for each ply.
+    """
+
+    def __init__(self, num_killers=2):
+        self.num_killers = num_killers
+        self.killers = []
+        # History scores of the root player's moves and the opponent's
+        self.history = ({}, {})
+        self.pv = []
+        self.on_pv = False
+        self._pv_table = []
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the node and cutoff counters."""
+        self.nodes = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self._cutoff_index_sum = 0
+
+    def stats(self):
+        """Return the number of nodes expanded, the number of cutoffs, the
+        fraction of cutoffs caused by the first move searched, and the mean
+        (0-based) index of the move that caused a cutoff.
+        """
+        cutoffs = max(self.cutoffs, 1)
+        return {"nodes": self.nodes,
+                "cutoffs": self.cutoffs,
+                "first_move_rate": self.first_move_cutoffs / cutoffs,
+                "mean_cutoff_index": self._cutoff_index_sum / cutoffs}
+
+    def new_search(self):
+        """Prepare for the search of a new move: the killers and the PV move
+        the same player's plies (two plies on), and old history scores are
+        halved so recent cutoffs weigh more.
+        """
+        self.killers = self.killers[2:]
+        self.pv = self.pv[2:]
+        for history in self.history:
+            for move in history:
+                history[move] //= 2
+
+    def start_iteration(self, depth):
+        """Prepare for an iteration of iterative deepening to `depth`."""
+        self._pv_table = [[] for _ in range(depth + 1)]
+        while len(self.killers) <= depth:
+            self.killers.append([])
+        self.on_pv = True
+
+    def finish_iteration(self):
+        """Keep the PV of the iteration that just completed."""
+        self.pv = self._pv_table[0]
+
+    def pv_move(self, ply):
+        """Return the PV move of a node at `ply`, or None if the node is not
+        on the PV of the previous iteration.
+        """
+        if self.on_pv and ply < len(self.pv):
+            return self.pv[ply]
+        return None
+
+    def order(self, moves, ply, pv_move=None, hash_move=None):
+        """Return the moves of a node at `ply` in the order to search them."""
+        self.nodes += 1
+        # A child that returns without being expanded (a table hit or a
+        # terminal position) must not leave an older PV for update_pv()
+        self._pv_table[ply] = []
+        self._pv_table[ply + 1] = []
+        first = []
+        for move in [pv_move, hash_move] + self.killers[ply]:
+            if move is not None and move not in first and move in moves:
+                first.append(move)
+        history = self.history[ply & 1]
+        rest = sorted((move for move in moves if move not in first),
+                      key=lambda move: history.get(move, 0), reverse=True)
+        return first + rest
+
+    def update_pv(self, ply, move, leaf):
+        """Record `move` as the best move so far of the node at `ply`,
+        followed by the PV of its child (none if the child is a leaf).
+        """
+        if leaf:
+            self._pv_table[ply] = [move]
+        else:
+            self._pv_table[ply] = [move] + self._pv_table[ply + 1]
+            # Taken: a later sibling that is not expanded has no PV
+            self._pv_table[ply + 1] = []
+
+    def cutoff(self, move, ply, depth, index):
+        """Record that `move`, the `index`-th move searched at `ply` with
+        `depth` plies left, caused a cutoff.
+        """
+        self.cutoffs += 1
+        self._cutoff_index_sum += index
+        if index == 0:
+            self.first_move_cutoffs += 1
+        killers = self.killers[ply]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[self.num_killers:]
+        history = self.history[ply & 1]
+        history[move] = history.get(move, 0) + depth * depth
+
+
 def custom_score(game, player):
     """Calculate the heuristic value of a game state from the point of view
     of the given player.
@@ -37,14 +535,25 @@ def custom_score(game, player):
     """
 
     # Get the number of legal move for the active player
-    score_player_1 = float(len(game.get_legal_moves(game._active_player)))
+    score_player_1 = float(game.count_legal_moves(game._active_player))
     # Get the number of legal moves for the inactive player
-    score_player_2 = float(len(game.get_legal_moves(game._inactive_player)))
+    score_player_2 = float(game.count_legal_moves(game._inactive_player))
     # Get the difference of legal moves between the 2 players
     score = score_player_1 - 1.5*score_player_2
     # If the score is a positive number, than Player 1 has a greater chance of winning
     return score
 
+
+def _custom_score_children(game, player, moves):
+    """Return custom_score for each child of `game` reached by `moves`."""
+    mover, waiting = game.count_child_moves(moves)
+    return [float(active) - 1.5*float(inactive)
+            for active, inactive in zip(waiting, mover)]
+
+
+custom_score.score_children = _custom_score_children
+
+
 def custom_score_2(game, player):
     """Calculate the heuristic value of a game state from the point of view
     of the given player.
@@ -78,8 +587,8 @@ def custom_score_2(game, player):
     player_2_position = game.get_player_location(game.get_opponent(player))
 
     # Get the number of legal moves for Player 1 and Player 2
-    player_1_moves = len(game.get_legal_moves(player))
-    player_2_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    player_1_moves = game.count_legal_moves(player)
+    player_2_moves = game.count_legal_moves(game.get_opponent(player))
 
     # Get the distance of Player 1 from the center
     player_1_distance_row = abs(center - player_1_position[0])
@@ -96,6 +605,29 @@ def custom_score_2(game, player):
     return float(score)
 
 
+def _custom_score_2_children(game, player, moves):
+    """Return custom_score_2 for each child of `game` reached by `moves`."""
+    center = game.height/2
+    mover, waiting = game.count_child_moves(moves)
+    if player == game._active_player:
+        own_moves, opp_moves = mover, waiting
+        own_positions = moves
+        opp_positions = [game.get_player_location(game._inactive_player)] * len(moves)
+    else:
+        own_moves, opp_moves = waiting, mover
+        own_positions = [game.get_player_location(player)] * len(moves)
+        opp_positions = moves
+    scores = []
+    for own, opp, own_position, opp_position in zip(
+            own_moves, opp_moves, own_positions, opp_positions):
+        score = 3*(own - opp) + (abs(center - own_position[0]) + abs(center - own_position[1])) - (abs(center - opp_position[0]) + abs(center - opp_position[1]))
+        scores.append(float(score))
+    return scores
+
+
+custom_score_2.score_children = _custom_score_2_children
+
+
 def custom_score_3(game, player):
     """Calculate the heuristic value of a game state from the point of view
     of the given player.
@@ -119,9 +651,9 @@ def custom_score_3(game, player):
         The heuristic value of the current game state to the specified player.
     """
 
-    score_player_1 = float(len(game.get_legal_moves(game._active_player)))
+    score_player_1 = float(game.count_legal_moves(game._active_player))
     # Get the number of legal moves for the inactive player
-    score_player_2 = float(len(game.get_legal_moves(game._inactive_player)))
+    score_player_2 = float(game.count_legal_moves(game._inactive_player))
     # Get the difference of legal moves between the 2 players
     score = 2.5*score_player_1 - score_player_2
 
@@ -129,6 +661,276 @@ def custom_score_3(game, player):
     return score
 
 
+def _custom_score_3_children(game, player, moves):
+    """Return custom_score_3 for each child of `game` reached by `moves`."""
+    mover, waiting = game.count_child_moves(moves)
+    return [2.5*float(active) - float(inactive)
+            for active, inactive in zip(waiting, mover)]
+
+
+custom_score_3.score_children = _custom_score_3_children
+
+
+def _center_distance(game, location):
+    """Return the squared distance of `location` to the center of the board
+    (0 for a player not yet on the board)."""
+    if location is None:
+        return 0.
+    return (game.height / 2. - location[0])**2 + (game.width / 2. - location[1])**2
+
+
+class WeightedScore(object):
+    """A score function with tunable weights, as tuned by `tune.py`:
+
+        own_weight * (player's moves) - opp_weight * (opponent's moves)
+            + center_weight * (opponent's distance - player's distance)
+
+    where the distances are squared distances to the center of the board,
+    so a positive `center_weight` rewards staying central. Won and lost
+    positions score +inf and -inf. Unlike the functions above, instances
+    are picklable (to be sent to worker processes) and have a `weights`
+    tuple; `score_children` scores the children of a node in one batch.
+
+    The terms are from the point of view of `player`, whereas
+    `custom_score` and `custom_score_3` score the active player's side
+    whoever asks: weights (1, 1.5, 0) and (2.5, 1, 0) only reproduce them
+    for the active player. `custom_score_2` (linear distances, rewarding
+    the edge) has no equivalent weights.
+
+    Parameters
+    ----------
+    own_weight, opp_weight, center_weight : float (optional)
+        The weights of the three terms.
+    """
+    PARAMETERS = ("own_weight", "opp_weight", "center_weight")
+
+    def __init__(self, own_weight=1., opp_weight=1.5, center_weight=0.):
+        self.own_weight = own_weight
+        self.opp_weight = opp_weight
+        self.center_weight = center_weight
+
+    def __repr__(self):
+        return "WeightedScore({})".format(", ".join(
+            "{}={:.3f}".format(name, weight)
+            for name, weight in zip(self.PARAMETERS, self.weights)))
+
+    @property
+    def weights(self):
+        return tuple(getattr(self, name) for name in self.PARAMETERS)
+
+    def __call__(self, game, player):
+        if game.is_loser(player):
+            return float("-inf")
+        if game.is_winner(player):
+            return float("inf")
+        opponent = game.get_opponent(player)
+        score = (self.own_weight * game.count_legal_moves(player) -
+                 self.opp_weight * game.count_legal_moves(opponent))
+        if self.center_weight:
+            score += self.center_weight * (
+                _center_distance(game, game.get_player_location(opponent)) -
+                _center_distance(game, game.get_player_location(player)))
+        return float(score)
+
+    def score_children(self, game, player, moves):
+        """Return the score of each child of `game` reached by `moves`."""
+        # The waiting player moves next in every child, and has lost there
+        # if they have no legal move
+        mover, waiting = game.count_child_moves(moves)
+        if player == game._active_player:
+            own_moves, opp_moves, utility = mover, waiting, float("inf")
+            own_locations = moves
+            opp_locations = [game.get_player_location(game._inactive_player)] * len(moves)
+        else:
+            own_moves, opp_moves, utility = waiting, mover, float("-inf")
+            own_locations = [game.get_player_location(player)] * len(moves)
+            opp_locations = moves
+        scores = []
+        for own, opp, end, own_location, opp_location in zip(
+                own_moves, opp_moves, waiting, own_locations, opp_locations):
+            if not end:
+                scores.append(utility)
+                continue
+            score = self.own_weight * own - self.opp_weight * opp
+            if self.center_weight:
+                score += self.center_weight * (
+                    _center_distance(game, opp_location) -
+                    _center_distance(game, own_location))
+            scores.append(float(score))
+        return scores
+
+
+class ScoreCache(object):
+    """Memoize a score function such as `custom_score`, so that positions
+    evaluated again (e.g., by every iteration of iterative deepening) are
+    looked up instead of evaluated.
+
+    The cache is keyed by the Zobrist hash of the position and whether the
+    evaluating player is the active player, which together identify the
+    player's side, and holds at most `max_entries` scores, evicting the
+    least recently used. An instance is called like the function it wraps,
+    so it can be passed as `score_fn` to any `IsolationPlayer`.
+
+    Parameters
+    ----------
+    score_fn : callable
+        The score function, called as score_fn(game, player).
+
+    max_entries : int (optional)
+        The maximum number of cached scores.
+    """
+
+    def __init__(self, score_fn, max_entries=1 << 16):
+        # Without the function's attributes: a `score_children` batch
+        # version would bypass the cache
+        functools.update_wrapper(self, score_fn, updated=())
+        self.score_fn = score_fn
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __call__(self, game, player):
+        key = game._hash << 1 | (player == game._active_player)
+        cache = self._cache
+        score = cache.get(key)
+        if score is not None:
+            cache.move_to_end(key)
+            self.hits += 1
+            return score
+        self.misses += 1
+        score = cache[key] = self.score_fn(game, player)
+        if len(cache) > self.max_entries:
+            cache.popitem(last=False)
+        return score
+
+    def clear(self):
+        """Remove every cached score and reset the counters."""
+        self._cache.clear()
+        self.hits = self.misses = 0
+
+    def stats(self):
+        """Return the hit and miss counts and the hit rate so far."""
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.}
+
+
+def batch_scores(player, game, moves):
+    """Return the scores for `player` of the children of `game` reached by
+    `moves`, computed in one call by the `score_children(game, player,
+    moves)` attribute of the player's score function, or None if it has
+    none.
+
+    Searches call it at the nodes one ply above the search horizon, where
+    it replaces creating and scoring every leaf board.
+    """
+    score_children = getattr(player.score, "score_children", None)
+    if score_children is None:
+        return None
+    player.clock.leaves += len(moves)
+    return score_children(game, player, moves)
+
+
+def successor_value(value_fn, game, move, in_place, *args):
+    """Return `value_fn(child, *args)` for the successor of `game` reached by
+    playing `move`.
+
+    When `in_place` is True the move is applied to `game` itself with
+    `push_move()` and reverted with `pop_move()` afterwards, so no board is
+    copied; otherwise the child is built with `forecast_move()`. A
+    SearchTimeout raised below an in-place node leaves `game` modified, so
+    callers must search on a scratch copy of the board they were given.
+    """
+    if not in_place:
+        return value_fn(game.forecast_move(move), *args)
+    game.push_move(move)
+    value = value_fn(game, *args)
+    game.pop_move()
+    return value
+
+
+def _board_state(game, player):
+    """Return a picklable tuple describing `game`, with `player` as the
+    searching player, for `_board_from_state()`.
+    """
+    return (game.width, game.height, game._blocked, game._p1_loc,
+            game._p2_loc, game._initiative, game.move_count,
+            game._player_1 == player)
+
+
+def _board_from_state(state, player, opponent):
+    """Rebuild a board from `_board_state()` for `player` and `opponent`."""
+    (width, height, blocked, p1_loc, p2_loc, initiative, move_count,
+     is_player_1) = state
+    players = (player, opponent) if is_player_1 else (opponent, player)
+    game = Board(players[0], players[1], width, height)
+    game._blocked = blocked
+    game._p1_loc, game._p2_loc = p1_loc, p2_loc
+    game._initiative = initiative
+    game._active_player = players[initiative]
+    game._inactive_player = players[1 - initiative]
+    game.move_count = move_count
+    game._hash = game._full_hash()
+    return game
+
+
+def _lazy_smp_helper(index, options, tt_name, tt_entries, jobs, results,
+                     current):
+    """Main loop of a Lazy SMP helper process of an `AlphaBetaPlayer`.
+
+    Each job is a (search id, board state, table age) tuple. The helper searches the
+    position by iterative deepening with its own move order, sharing the
+    transposition table `tt_name`, and puts (search id, depth, move) on
+    `results` for every completed iteration until `current` (the id of the
+    search in progress) changes. Odd helpers start one ply deeper.
+    """
+    random.seed()
+    player = AlphaBetaPlayer(**options)
+    player.tt = SharedTranspositionTable(tt_entries, name=tt_name)
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        search_id, state, age = job
+        game = _board_from_state(state, player, "opponent")
+
+        def time_left():
+            return -1. if current.value != search_id else float("inf")
+
+        player.time_left = time_left
+        player.clock = SearchClock(time_left, 0., period=1.)
+        player._new_search()
+        player.tt.age = age
+        root_moves = game.symmetric_moves() if player.symmetric_root else None
+        depth = 1 + index % 2
+        try:
+            while depth <= len(game.get_blank_spaces()):
+                move = player.alphabeta(game, depth, legal_moves=root_moves)
+                results.put((search_id, depth, move))
+                depth += 1
+        except SearchTimeout:
+            pass
+    player.tt.close()
+
+
+def _stop_helpers(processes, jobs, tt):
+    """Stop the helper processes of an `AlphaBetaPlayer` and destroy its
+    shared transposition table.
+    """
+    for job_queue in jobs:
+        job_queue.put(None)
+    for process in processes:
+        process.join(1.)
+        if process.is_alive():
+            process.terminate()
+    del processes[:], jobs[:]
+    tt.close(unlink=True)
+
+
 class IsolationPlayer:
     """Base class for minimax and alphabeta agents -- this class is never
     constructed or tested directly.
@@ -162,7 +964,25 @@ class MinimaxPlayer(IsolationPlayer):
     """Game-playing agent that chooses a move using depth-limited minimax
     search. You must finish and test this player to make sure it properly uses
     minimax to return a good move before the search time limit expires.
+
+    Parameters
+    ----------
+    in_place : bool (optional)
+        Walk the game tree on one scratch board with `Board.push_move()` and
+        `Board.pop_move()` instead of copying the board at every node with
+        `Board.forecast_move()`.
+
+    Every call to `get_move()` appends the `SearchStats` of its search to
+    `move_stats`.
+
+    See `IsolationPlayer` for the remaining parameters.
     """
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.,
+                 in_place=False):
+        super().__init__(search_depth, score_fn, timeout)
+        self.in_place = in_place
+        self.clock = None
+        self.move_stats = []
 
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
@@ -193,22 +1013,34 @@ class MinimaxPlayer(IsolationPlayer):
             (-1, -1) if there are no available legal moves.
         """
         self.time_left = time_left
+        start_ns = time.perf_counter_ns()
+        self._start_clock()
+        start_counts = self.clock.counts()
 
         # Initialize the best move so that this function returns something
         # in case the search fails due to timeout
-        best_move = (-1, -1)
+        legal_moves = game.get_legal_moves()
+        best_move = legal_moves[0] if legal_moves else (-1, -1)
+        depth = 0
 
         try:
             # The try/except block will automatically catch the exception
             # raised when the timer is about to expire.
-            return self.minimax(game, self.search_depth)
+            best_move = self.minimax(game, self.search_depth)
+            depth = self.search_depth
 
         except SearchTimeout:
             pass  # Handle any actions required after timeout as needed
 
+        self.move_stats.append(self.clock.stats(start_counts, depth, start_ns))
         # Return the best move from the last completed search iteration
         return best_move
 
+    def _start_clock(self):
+        """Create the search clock for the current `time_left` callable."""
+        if self.clock is None or self.clock.time_left is not self.time_left:
+            self.clock = SearchClock(self.time_left, self.TIMER_THRESHOLD)
+
     def minimax(self, game, depth):
         """Implement depth-limited minimax search algorithm as described in
         the lectures.
@@ -250,26 +1082,35 @@ class MinimaxPlayer(IsolationPlayer):
                 testing.
         """
 
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        self._start_clock()
+        self.clock.tick()
 
         # Initialize the best move so that this function returns something
         # in case the search fails due to timeout
 
+        # Search in-place on a scratch copy so a timeout cannot leave the
+        # caller's board modified
+        if self.in_place:
+            game = game.copy()
+
         # Get legal moves
         legal_moves = game.get_legal_moves()
 
         # If no legal moves remains return the utility value of the current game state for the specified player and the coordinate of best move
         if not legal_moves:
             return game.utility(self), (-1, -1)
-        # Initialize best_move
-        best_move = None
+        # Initialize best_move (played even if every move loses)
+        best_move = legal_moves[0]
         # Initialize best_score to - inf, small score
         best_score = float("-Inf")
 
+        scores = batch_scores(self, game, legal_moves) if depth == 1 else None
         # For all legal moves, get the minimum value of the highest score
-        for move in legal_moves:
-            score = self.min_value(game.forecast_move(move), depth - 1)
+        for index, move in enumerate(legal_moves):
+            if scores is not None:
+                score = scores[index]
+            else:
+                score = successor_value(self.min_value, game, move, self.in_place, depth - 1)
             if score > best_score:
                 best_score = score
                 best_move = move
@@ -277,43 +1118,52 @@ class MinimaxPlayer(IsolationPlayer):
         return best_move
 
     def max_value(self, game, depth):
-            if self.time_left() < self.TIMER_THRESHOLD:
-               raise SearchTimeout()
+            self.clock.tick()
             #
             if depth == 0:
+                self.clock.leaves += 1
                 return self.score(game, self)
             # Get all legal moves
             legal_moves = game.get_legal_moves()
             # if no legal moves return the utility value of the current game state for the specified player
             if not legal_moves:
                 return game.utility(self)
+            # Score the leaves below this node in one batch when possible
+            if depth == 1:
+                scores = batch_scores(self, game, legal_moves)
+                if scores is not None:
+                    return max(scores)
             # Initialize best_move
             best_move = None
             # Initialize best_score to -inf, small score
             best_score = float("-Inf")
             # For all legal moves, get the maximum value of the lowest score
             for move in legal_moves:
-                best_score = max(best_score,self.min_value(game.forecast_move(move),depth - 1))
+                best_score = max(best_score, successor_value(self.min_value, game, move, self.in_place, depth - 1))
             return best_score
 
     def min_value(self, game, depth):
-            if self.time_left() < self.TIMER_THRESHOLD:
-                raise SearchTimeout()
+            self.clock.tick()
 
             if depth == 0:
+                self.clock.leaves += 1
                 return self.score(game, self)
             # Get all legal moves
             legal_moves = game.get_legal_moves()
             # If no legal moves remains return the utility value of the current game state for the specified player
             if not legal_moves:
                 return game.utility(self)
+            if depth == 1:
+                scores = batch_scores(self, game, legal_moves)
+                if scores is not None:
+                    return min(scores)
             # Initialize best_move
             #best_move = None
             # Initialize best_score to inf, big score
             best_score = float("Inf")
             # For all legal moves, get the minimum value of the highest score
             for move in legal_moves:
-                best_score = min(best_score, self.max_value(game.forecast_move(move), depth - 1))
+                best_score = min(best_score, successor_value(self.max_value, game, move, self.in_place, depth - 1))
             return best_score
 
 
@@ -321,7 +1171,148 @@ class AlphaBetaPlayer(IsolationPlayer):
     """Game-playing agent that chooses a move using iterative deepening minimax
     search with alpha-beta pruning. You must finish and test this player to
     make sure it returns a good move before the search time limit expires.
+
+    Parameters
+    ----------
+    in_place : bool (optional)
+        Walk the game tree on one scratch board with `Board.push_move()` and
+        `Board.pop_move()` instead of copying the board at every node with
+        `Board.forecast_move()`. The nodes searched are the same; measured
+        on 15 positions, iterations to depth 9 take 3-10% less time, but
+        to depth 7, or with `move_ordering`, the two are within noise.
+
+    symmetric_root : bool (optional)
+        When the root position is symmetric (e.g., the opening plies), only
+        search one representative of each class of equivalent moves, as
+        returned by `Board.symmetric_moves()`.
+
+    endgame_solver : bool (optional)
+        Once the players are in separate regions of the board, play the
+        longest knight path found by an exact `isolation.LongestPathSolver`
+        instead of searching with the heuristic. Off by default.
+
+    tt_entries : int (optional)
+        The number of entries of a `TranspositionTable` kept across
+        iterations and moves, which the search probes before expanding a
+        node at least `MIN_TT_DEPTH` plies above the horizon; no table is
+        used if None (the default). Isolation has few transpositions, so the
+        table mostly pays off for pondering and Lazy SMP, and costs about
+        10% of the node rate otherwise.
+
+    move_ordering : bool (optional)
+        Search the moves of every node in the order given by a
+        `MoveOrdering` (PV move, table move, killer moves, history scores)
+        instead of the order of `Board.get_legal_moves()`. Off by default.
+
+    pvs : bool (optional)
+        Run the search as principal variation search (NegaScout): only the
+        first move of each node is searched with the full window, and the
+        others with a null window that only tests whether they are better,
+        followed by a full-window re-search when they are.
+
+    aspiration_window : float (optional)
+        Start each iteration of iterative deepening with the window
+        (score - aspiration_window, score + aspiration_window) around the
+        score of the previous iteration, widening it and searching again
+        when the result falls outside; full windows are used if None.
+
+    ponder : str (optional)
+        Keep searching in a background thread while the opponent thinks
+        (see `opponent_turn_started()`): PONDER_PREDICTED searches the reply
+        predicted by the principal variation, or every reply if there is no
+        prediction, and PONDER_ALL searches every reply. The results fill
+        the transposition table (one is created if `tt_entries` is None),
+        and the search of the reply actually played resumes from the depth
+        reached. Pondering is off if None (the default). The pondering
+        thread shares the GIL with everything else in this process, so an
+        opponent searching in the same process (e.g., both players of a
+        local `Board.play()`) is slowed down: from 62k to 51-53k nodes per
+        second and about one ply shallower in measured games. It is only
+        free against an opponent running in another process.
+
+    workers : int (optional)
+        The number of helper processes of a Lazy SMP search: while this
+        player searches the root as usual, the helpers search the same root
+        with their own random move orders (every other helper starting one
+        ply deeper), all sharing a `SharedTranspositionTable`, and the
+        deepest iteration completed by any of them is played. The helpers
+        are started with the player (so that the time it takes is not
+        charged to the first move) and kept alive until `close()`. At
+        most one helper per CPU core besides this process is started, as
+        helpers competing for a core delay the clock checks of the search.
+
+    time_management : bool (optional)
+        Let a `TimeManager` decide when to stop deepening: iterations that
+        cannot finish in time are not started, the search stops early when
+        the best move is stable, forced or decided, and with a chess clock
+        (an `isolation.Deadline` with `per_move` False) each move gets a
+        share of the time left for the game. Without it (the default), the
+        search deepens until the time runs out. The manager plans on the
+        wall clock, but the search still stops when `time_left` runs out.
+
+    opening_book : str (optional)
+        The path of an opening book written by `build_book.py`; positions
+        found in the book are played at once without searching. The book is
+        read through `isolation.book.OpeningBook`, and unmapped by
+        `close()` (or on leaving a `with` block).
+
+    Every call to `get_move()` appends the `SearchStats` of its search to
+    `move_stats` (the Lazy SMP helpers are not counted).
+
+    See `IsolationPlayer` for the remaining parameters.
     """
+    NULL_WINDOW = 1e-6
+    MIN_MOVES_TO_GO = 4
+    # Nodes within two plies of the horizon are cheaper to search again
+    # than to probe and store, and their stored moves would displace the
+    # killer and history moves from the front of the ordering
+    MIN_TT_DEPTH = 3
+    PONDER_PREDICTED = "predicted"
+    PONDER_ALL = "all"
+
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.,
+                 in_place=False, symmetric_root=False, endgame_solver=False,
+                 tt_entries=None, move_ordering=False, pvs=False,
+                 aspiration_window=None, ponder=None, workers=0,
+                 time_management=False, opening_book=None):
+        super().__init__(search_depth, score_fn, timeout)
+        self.in_place = in_place
+        self.clock = None
+        self.symmetric_root = symmetric_root
+        self.endgame = LongestPathSolver() if endgame_solver else None
+        if ponder not in (None, self.PONDER_PREDICTED, self.PONDER_ALL):
+            raise ValueError("Unknown pondering mode: {!r}".format(ponder))
+        workers = min(workers, max(0, (os.cpu_count() or 1) - 1))
+        if workers:
+            self.tt = SharedTranspositionTable(tt_entries or 1 << 18)
+        elif tt_entries is None and ponder is not None:
+            self.tt = TranspositionTable()
+        else:
+            self.tt = None if tt_entries is None else TranspositionTable(tt_entries)
+        self.ordering = MoveOrdering() if move_ordering else None
+        self.pvs = pvs
+        self.aspiration_window = aspiration_window
+        self.ponder = ponder
+        self._ponder_thread = None
+        self._ponder_stop = None
+        self._pondered = None
+        self.root_score = None
+        self._root_depth = 0
+        self.completed_depth = 0
+        self.move_stats = []
+        self.time_management = time_management
+        self.book = None if opening_book is None else OpeningBook(opening_book)
+        self.workers = workers
+        self._helpers = []
+        self._jobs = []
+        self._results = None
+        self._search_id = None
+        if workers:
+            self._close = weakref.finalize(self, _stop_helpers, self._helpers,
+                                           self._jobs, self.tt)
+            # Starting processes takes milliseconds, which must not be
+            # charged to the clock of the first move
+            self._spawn_helpers()
 
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
@@ -354,26 +1345,286 @@ class AlphaBetaPlayer(IsolationPlayer):
             (-1, -1) if there are no available legal moves.
         """
 
+        start_ns = time.perf_counter_ns()
+        pondered, self._pondered = self._pondered, None
+        manager = None
+        if self.time_management:
+            # With a chess clock the time left must last for the rest of the
+            # game, which takes about two plies per blank space filled
+            moves_to_go = None
+            if not getattr(time_left, "per_move", True):
+                moves_to_go = max(self.MIN_MOVES_TO_GO,
+                                  len(game.get_blank_spaces()) // 4)
+            manager = TimeManager(time_left, self.TIMER_THRESHOLD, moves_to_go)
+            time_left = manager.deadline
         self.time_left = time_left
+        self._start_clock()
+        start_counts = self.clock.counts()
+        self.completed_depth = 0
 
         # Get all the legal moves
         legal_moves = game.get_legal_moves()
         # If no legal moves remains return the utility value of the current game state for the specified player and the coordinate of best move\
         best_move = (-1,-1)
         if not legal_moves:
-           return best_move
+           return self._finish_move(best_move, start_counts, start_ns)
+        # A forced move needs no search
+        if len(legal_moves) == 1 and manager is not None:
+            return self._finish_move(legal_moves[0], start_counts, start_ns)
+        if self.book is not None:
+            move = self.book.lookup(game)
+            if move in legal_moves:
+                return self._finish_move(move, start_counts, start_ns)
             # The try/except block will automatically catch the exception raised when the timer is about to expire.
             # It will returns a good move before the search time limit expires.
+        # Once the players are separated the game can be solved exactly
+        if self.endgame is not None and game.is_partitioned():
+            move = self.solve_endgame(game)
+            if move is not None:
+                return self._finish_move(move, start_counts, start_ns)
+
+        # Equivalent root moves lead to equivalent subtrees, so searching a
+        # single representative of each is enough
+        root_moves = game.symmetric_moves() if self.symmetric_root else None
+        # Any legal move beats forfeiting if the first iteration times out
+        best_move = legal_moves[0]
         depth = 1
+        score = None
+        if pondered is None:
+            self._new_search()
+        elif game.hash() in pondered:
+            # Resume from the deepest iteration completed while pondering
+            ponder_depth, move, score = pondered[game.hash()]
+            if move in legal_moves:
+                best_move, depth = move, ponder_depth + 1
+            else:
+                score = None
+        self.completed_depth = depth - 1
+        if self.workers:
+            self._start_helpers(game)
+        # Every line ends before the last blank space is filled, so deeper
+        # iterations would not change the result
+        max_depth = len(game.get_blank_spaces())
         try:
-            while True:
-                best_move = self.alphabeta(game, depth)
+            while depth <= max_depth:
+                if (manager is not None and manager.nodes and
+                        not manager.should_continue()):
+                    break
+                start_nodes = self.clock.nodes
+                start_time = manager.elapsed() if manager is not None else 0.
+                alpha, beta, window = self._aspiration(score)
+                while True:
+                    move = self.alphabeta(game, depth, alpha, beta, legal_moves=root_moves)
+                    score = self.root_score
+                    # Widen the side of the window the score fell outside
+                    # of until the score is exact
+                    if score <= alpha and alpha > float("-inf"):
+                        window *= 4
+                        alpha = score - window
+                    elif score >= beta and beta < float("inf"):
+                        # A fail-high move is at least as good as beta
+                        best_move = move
+                        window *= 4
+                        beta = score + window
+                    else:
+                        break
+                best_move = move
+                self.completed_depth = depth
+                if manager is not None:
+                    manager.record(self.clock.nodes - start_nodes,
+                                   manager.elapsed() - start_time, move, score)
                 depth = depth +1
         except SearchTimeout:
                 pass
+        if self.workers:
+            best_move = self._collect_helpers(best_move, legal_moves)
+        return self._finish_move(best_move, start_counts, start_ns)
+
+    def _finish_move(self, move, start_counts, start_ns):
+        """Record the `SearchStats` of the search of the current move, and
+        return the move.
+        """
+        self.move_stats.append(
+            self.clock.stats(start_counts, self.completed_depth, start_ns))
+        return move
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Stop the Lazy SMP helper processes, if any, release the shared
+        transposition table, and unmap the opening book (which is mapped
+        again if the player is used afterwards). A player closed with
+        helpers goes on searching alone, with a private table.
+        """
+        if self.workers:
+            self._close()
+            self.workers = 0
+            self.tt = TranspositionTable(self.tt.max_entries)
+        if self.book is not None:
+            self.book.close()
+
+    def _spawn_helpers(self):
+        """Start the Lazy SMP helper processes, which wait for jobs."""
+        self._results = multiprocessing.Queue()
+        self._search_id = multiprocessing.RawValue("q", 0)
+        options = dict(score_fn=self.score, in_place=self.in_place,
+                       symmetric_root=self.symmetric_root,
+                       endgame_solver=False,
+                       move_ordering=self.ordering is not None,
+                       pvs=self.pvs)
+        for index in range(1, self.workers + 1):
+            jobs = multiprocessing.Queue()
+            process = multiprocessing.Process(
+                target=_lazy_smp_helper,
+                args=(index, options, self.tt.name, self.tt.max_entries,
+                      jobs, self._results, self._search_id))
+            process.daemon = True
+            process.start()
+            self._jobs.append(jobs)
+            self._helpers.append(process)
+
+    def _start_helpers(self, game):
+        """Send the Lazy SMP helpers the root position of a new search."""
+        self._search_id.value += 1
+        state = _board_state(game, self)
+        for jobs in self._jobs:
+            jobs.put((self._search_id.value, state, self.tt.age))
+
+    def _collect_helpers(self, best_move, legal_moves):
+        """Stop the helpers and return the move of the deepest iteration
+        completed by this player or any helper.
+        """
+        search_id = self._search_id.value
+        self._search_id.value += 1
+        while True:
+            try:
+                result_id, depth, move = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if (result_id == search_id and depth > self.completed_depth and
+                    move in legal_moves):
+                best_move, self.completed_depth = move, depth
         return best_move
 
-    def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf")):
+    def _new_search(self):
+        """Prepare the transposition table and move ordering for the search
+        of a new move.
+        """
+        if self.tt is not None:
+            self.tt.new_search()
+        if self.ordering is not None:
+            self.ordering.new_search()
+
+    def opponent_turn_started(self, game):
+        """Called by `Board.play()` with a copy of the game when the
+        opponent's turn starts; starts pondering if enabled.
+        """
+        if self.ponder is None:
+            return
+        self._stop_pondering()
+        self._ponder_stop = threading.Event()
+        self._pondered = {}
+        self._ponder_thread = threading.Thread(
+            target=self._ponder, args=(game, self._ponder_stop, self._pondered))
+        self._ponder_thread.daemon = True
+        self._ponder_thread.start()
+
+    def opponent_turn_ended(self, move):
+        """Called by `Board.play()` with the opponent's move when their turn
+        ends; stops pondering before our own turn starts.
+        """
+        self._stop_pondering()
+
+    def _stop_pondering(self):
+        """Stop the pondering thread, if any, and wait for it to finish."""
+        if self._ponder_thread is not None:
+            self._ponder_stop.set()
+            self._ponder_thread.join()
+            self._ponder_thread = None
+
+    def _ponder(self, game, stop, pondered):
+        """Search the opponent's replies in `game` by iterative deepening
+        until `stop` is set, recording (depth, best move, score) of every
+        completed iteration in `pondered` by the hash of the position.
+        """
+        # Our principal variation predicts the opponent's reply
+        predicted = None
+        pv = self.ordering.pv if self.ordering is not None else []
+        if len(pv) > 1 and pv[0] == game.get_player_location(self):
+            predicted = pv[1]
+        self._new_search()
+
+        replies = game.get_legal_moves()
+        if predicted in replies:
+            replies.remove(predicted)
+            replies.insert(0, predicted)
+            if self.ponder == self.PONDER_PREDICTED:
+                replies = replies[:1]
+        positions = [game.forecast_move(reply) for reply in replies]
+        positions = [position for position in positions
+                     if position.get_legal_moves()]
+
+        def time_left():
+            # Give up the GIL at every clock reading (about once a
+            # millisecond); an opponent searching in this process still
+            # shares it and loses about a sixth of its node rate
+            time.sleep(0)
+            return -1. if stop.is_set() else float("inf")
+
+        self.time_left = time_left
+        self.clock = SearchClock(time_left, 0., period=1.)
+        depth = 1
+        try:
+            while positions:
+                for position in positions:
+                    move = self.alphabeta(position, depth)
+                    pondered[position.hash()] = (depth, move, self.root_score)
+                depth += 1
+        except SearchTimeout:
+            pass
+
+    def _aspiration(self, score):
+        """Return the (alpha, beta) window of the next iteration for the
+        score of the previous one, and the half-width of the window.
+        """
+        window = self.aspiration_window
+        if window is None or score is None or score in (float("-inf"), float("inf")):
+            return float("-inf"), float("inf"), window
+        return score - window, score + window, window
+
+    def solve_endgame(self, game):
+        """Return the first move of the active player's longest path in a
+        partitioned game, or None if the solver needs more than half of the
+        time left (the caller then falls back to heuristic search).
+
+        The active player wins if their longest path is longer than the
+        opponent's, so the opponent's path is only searched up to an upper
+        bound on ours, and ours only until it beats the opponent's.
+        """
+        clock = SearchClock(self.time_left,
+                            max(self.TIMER_THRESHOLD, self.time_left() / 2.))
+        player, opponent = game.active_player, game.inactive_player
+        try:
+            bound = self.endgame.upper_bound(game, player)
+            opp_length, _ = self.endgame.solve(game, opponent, clock.tick,
+                                               target=bound)
+            _, move = self.endgame.solve(game, player, clock.tick,
+                                         target=opp_length + 1)
+        except SearchTimeout:
+            return None
+        return move
+
+    def _start_clock(self):
+        """Create the search clock for the current `time_left` callable."""
+        if self.clock is None or self.clock.time_left is not self.time_left:
+            self.clock = SearchClock(self.time_left, self.TIMER_THRESHOLD)
+
+    def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf"),
+                  legal_moves=None):
         """Implement depth-limited minimax search with alpha-beta pruning as
         described in the lectures.
 
@@ -401,6 +1652,9 @@ class AlphaBetaPlayer(IsolationPlayer):
         beta : float
             Beta limits the upper bound of search on maximizing layers
 
+        legal_moves : list<(int, int)> (optional)
+            The root moves to search; defaults to all legal moves
+
         Returns
         -------
         (int, int)
@@ -418,8 +1672,8 @@ class AlphaBetaPlayer(IsolationPlayer):
                 each helper function or else your agent will timeout during
                 testing.
         """
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        self._start_clock()
+        self.clock.tick()
 
 
         # If no legal moves remains return the utility value of the current game state for the specified player and the coordinate of best move
@@ -428,29 +1682,132 @@ class AlphaBetaPlayer(IsolationPlayer):
         #best_move = None
         # Initialize best score to -inf, small score
 
+        # Search in-place on a scratch copy so a timeout cannot leave the
+        # caller's board modified
+        if self.in_place:
+            game = game.copy()
+
         # Initialize best move
         best_move = (-1, -1)
     # For all the legal moves get the minimum value of the maximum score
         # Get all the legal moves
-        legal_moves = game.get_legal_moves()
+        if legal_moves is None:
+            legal_moves = game.get_legal_moves()
         if not legal_moves:
            return game.utility(self)
-        best_score = float("-Inf")
-        for move in legal_moves:
 
-            score = self.alpha_beta_min_value(game.forecast_move(move), depth - 1, alpha, beta)
+        # Search the best move of the previous iteration first
+        alpha_orig = alpha
+        entry = None
+        if self.tt is not None:
+            self.tt.set_perspective(game.move_count % 2)
+            key = game.hash()
+            entry = self.tt.probe(key)
+        ordering = self.ordering
+        self._root_depth = depth
+        if ordering is not None:
+            ordering.start_iteration(depth)
+        legal_moves, pv_move = self._order_moves(legal_moves, 0, entry)
+
+        # When every move loses, still play one rather than forfeit
+        best_move = legal_moves[0]
+        best_score = float("-Inf")
+        scores = batch_scores(self, game, legal_moves) if depth == 1 else None
+        for index, move in enumerate(legal_moves):
+            if ordering is not None:
+                ordering.on_pv = move == pv_move
+
+            if scores is not None:
+                score = scores[index]
+            else:
+                score = self._child_value(self.alpha_beta_min_value, game, move, index, depth, alpha, beta)
             if score > best_score:
                 best_score = score
                 best_move = move
+                if ordering is not None and score > alpha:
+                    ordering.update_pv(0, move, depth == 1)
+            # The score is outside of an aspiration window
+            if best_score >= beta:
+                break
             alpha = max(alpha, best_score)
+
+        self.root_score = best_score
+        if self.tt is not None:
+            self.tt.store(key, depth, TranspositionTable.bound(best_score, alpha_orig, beta), best_score, best_move)
+        if ordering is not None:
+            ordering.finish_iteration()
         return best_move
 
+    def _tt_probe(self, key, depth, alpha, beta):
+        """Look up a position in the transposition table.
+
+        Returns the stored entry (or None), and the score to return at once
+        if the entry was searched deep enough to decide the node within the
+        window (alpha, beta), or None.
+        """
+        entry = self.tt.probe(key)
+        if entry is None or entry[1] < depth:
+            return entry, None
+        _, _, flag, score, _, _ = entry
+        if (flag == TranspositionTable.EXACT or
+                (flag == TranspositionTable.LOWER and score >= beta) or
+                (flag == TranspositionTable.UPPER and score <= alpha)):
+            return entry, score
+        return entry, None
+
+    def _child_value(self, value_fn, game, move, index, depth, alpha, beta):
+        """Return the value of the child reached by the `index`-th move
+        searched at a node with `depth` plies left and window (alpha, beta).
+
+        With PVS, every move after the first is searched with a null window
+        at the bound of the side to move (alpha for the maximizing player,
+        beta for the minimizing player) and searched again with the full
+        window only when it turns out to be inside of the window.
+        """
+        if self.pvs and index:
+            if value_fn == self.alpha_beta_min_value:
+                if alpha > float("-inf"):
+                    score = successor_value(value_fn, game, move, self.in_place, depth - 1,
+                                            alpha, alpha + self.NULL_WINDOW)
+                    if not alpha < score < beta:
+                        return score
+            elif beta < float("inf"):
+                score = successor_value(value_fn, game, move, self.in_place, depth - 1,
+                                        beta - self.NULL_WINDOW, beta)
+                if not alpha < score < beta:
+                    return score
+        return successor_value(value_fn, game, move, self.in_place, depth - 1, alpha, beta)
+
+    def _order_moves(self, legal_moves, ply, entry):
+        """Return the legal moves of a node at `ply` in the order to search
+        them, and the node's PV move (None if the node is not on the PV).
+
+        Without move ordering only the best move stored in the transposition
+        table entry (if any) is moved to the front.
+        """
+        hash_move = None if entry is None else entry[4]
+        if self.ordering is not None:
+            pv_move = self.ordering.pv_move(ply)
+            return self.ordering.order(legal_moves, ply, pv_move, hash_move), pv_move
+        if hash_move is None or hash_move not in legal_moves:
+            return legal_moves, None
+        return [hash_move] + [move for move in legal_moves if move != hash_move], None
+
     def alpha_beta_max_value(self, game, depth, alpha, beta):
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        self.clock.tick()
 
         if depth == 0:
+            self.clock.leaves += 1
             return self.score(game, self)
+
+        # Probe the transposition table before expanding the node
+        entry = None
+        use_tt = self.tt is not None and depth >= self.MIN_TT_DEPTH
+        if use_tt:
+            key = game.hash()
+            entry, tt_score = self._tt_probe(key, depth, alpha, beta)
+            if tt_score is not None:
+                return tt_score
         # Initialize best_move
         #best_move = (-1, -1)
 
@@ -461,24 +1818,58 @@ class AlphaBetaPlayer(IsolationPlayer):
         if not legal_moves:
            return game.utility(self)
             #return (-1,-1)
+        alpha_orig = alpha
+        ordering = self.ordering
+        ply = self._root_depth - depth
+        legal_moves, pv_move = self._order_moves(legal_moves, ply, entry)
+        # Score the leaves below this node in one batch when possible
+        scores = batch_scores(self, game, legal_moves) if depth == 1 else None
         # Initialize best_move to zero
-        #best_move = None
+        best_move = None
         # Initialize best_move to -inf, small score
         best_score = float("-Inf")
-        for move in legal_moves:
+        for index, move in enumerate(legal_moves):
+            if ordering is not None:
+                ordering.on_pv = move == pv_move
             # For all the legal moves get the minimum value of the maximum score
-            best_score = max(best_score, self.alpha_beta_min_value(game.forecast_move(move), depth - 1, alpha, beta))
+            if scores is not None:
+                score = scores[index]
+            else:
+                score = self._child_value(self.alpha_beta_min_value, game, move, index, depth, alpha, beta)
+            if score > best_score:
+                best_score, best_move = score, move
             if best_score >= beta:
-                return best_score
+                self.clock.cutoffs += 1
+                if ordering is not None:
+                    ordering.cutoff(move, ply, depth, index)
+                break
+            if ordering is not None and score > alpha:
+                ordering.update_pv(ply, move, depth == 1)
             alpha = max(alpha, best_score)
+
+        if use_tt:
+            flag = TranspositionTable.bound(best_score, alpha_orig, beta)
+            # Every move failed low, so none of them is known to be best
+            if flag == TranspositionTable.UPPER:
+                best_move = None
+            self.tt.store(key, depth, flag, best_score, best_move)
         return best_score
 
     def alpha_beta_min_value(self, game, depth, alpha, beta):
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        self.clock.tick()
 
         if depth == 0:
+            self.clock.leaves += 1
             return self.score(game, self)
+
+        # Probe the transposition table before expanding the node
+        entry = None
+        use_tt = self.tt is not None and depth >= self.MIN_TT_DEPTH
+        if use_tt:
+            key = game.hash()
+            entry, tt_score = self._tt_probe(key, depth, alpha, beta)
+            if tt_score is not None:
+                return tt_score
         # Initilize best_move
         #best_move = (-1,-1)
         # Get all legal moves
@@ -487,15 +1878,313 @@ class AlphaBetaPlayer(IsolationPlayer):
         if not legal_moves:
             return game.utility(self)
 
+        beta_orig = beta
+        ordering = self.ordering
+        ply = self._root_depth - depth
+        legal_moves, pv_move = self._order_moves(legal_moves, ply, entry)
+        scores = batch_scores(self, game, legal_moves) if depth == 1 else None
         # Initilize best_move to zero
-       # best_move = None
+        best_move = None
         # Initilize best_score to inf, high score
         best_score = float("Inf")
         # For all the legal moves get the maximum value of the minimum score
-        for move in legal_moves:
-            best_score = min(best_score, self.alpha_beta_max_value(game.forecast_move(move), depth - 1, alpha, beta))
+        for index, move in enumerate(legal_moves):
+            if ordering is not None:
+                ordering.on_pv = move == pv_move
+            if scores is not None:
+                score = scores[index]
+            else:
+                score = self._child_value(self.alpha_beta_max_value, game, move, index, depth, alpha, beta)
+            if score < best_score:
+                best_score, best_move = score, move
             if best_score <= alpha:
-                return best_score
+                self.clock.cutoffs += 1
+                if ordering is not None:
+                    ordering.cutoff(move, ply, depth, index)
+                break
+            if ordering is not None and score < beta:
+                ordering.update_pv(ply, move, depth == 1)
             beta = min(beta, best_score)
+
+        if use_tt:
+            flag = TranspositionTable.bound(best_score, alpha, beta_orig)
+            if flag == TranspositionTable.LOWER:
+                best_move = None
+            self.tt.store(key, depth, flag, best_score, best_move)
         return best_score
 
+
+class _MCTSNode(object):
+    """A node of the `MCTSPlayer` search tree, reached by the move (cell
+    index) `move` of player `player` (0 for player 1, 1 for player 2).
+    `wins` counts the simulations through the node won by that player.
+    """
+    __slots__ = ("move", "player", "untried", "children", "visits", "wins")
+
+    def __init__(self, move, player, untried):
+        self.move = move
+        self.player = player
+        self.untried = untried
+        self.children = []
+        self.visits = 0
+        self.wins = 0
+
+
+class MCTSPlayer(IsolationPlayer):
+    """Game-playing agent that chooses a move using Monte Carlo tree search
+    with UCT selection, running simulations until the time runs out.
+
+    The tree holds cell indices only, and simulations replay the moves on
+    the integer bitmask state of the board (blocked cells, player locations
+    and initiative) instead of creating `Board` objects. The subtree under
+    the moves actually played is kept for the next turn.
+
+    Parameters
+    ----------
+    exploration : float (optional)
+        The UCT exploration constant.
+
+    rollout : str (optional)
+        The policy of the simulations past the tree: ROLLOUT_RANDOM plays
+        uniformly random moves, and ROLLOUT_MOBILITY draws two random moves
+        and plays the one with more open moves from its cell.
+
+    max_simulations : int (optional)
+        Stop after this many simulations per move even if time is left
+        (e.g., for reproducible tests); only the time limit applies if None.
+
+    seed : hashable (optional)
+        Seed for the random generator of the simulations.
+
+    Every call to `get_move()` appends the `SearchStats` of its search to
+    `move_stats`, with one node and leaf evaluation per simulation and the
+    depth of the deepest tree node selected.
+
+    See `IsolationPlayer` for the remaining parameters.
+    """
+    ROLLOUT_RANDOM = "random"
+    ROLLOUT_MOBILITY = "mobility"
+    # The third garbage collector threshold during a search
+    GC_THRESHOLD = 1 << 30
+
+    def __init__(self, exploration=1.4, rollout=ROLLOUT_RANDOM,
+                 max_simulations=None, seed=None, timeout=10.):
+        super().__init__(score_fn=None, timeout=timeout)
+        if rollout not in (self.ROLLOUT_RANDOM, self.ROLLOUT_MOBILITY):
+            raise ValueError("Unknown rollout policy: {!r}".format(rollout))
+        self.exploration = exploration
+        self.rollout = rollout
+        self.max_simulations = max_simulations
+        self._rng = random.Random(seed)
+        self.clock = None
+        self.move_stats = []
+        self._root = None
+        self._root_state = None
+        self._discarded = None
+        self._geometry = None
+        self._max_depth = 0
+
+    def get_move(self, game, time_left):
+        """Search for the best move until the time limit expires, and return
+        the root move with the most simulations.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            An instance of `isolation.Board` encoding the current state of the
+            game (e.g., player locations and blocked cells).
+
+        time_left : callable
+            A function that returns the number of milliseconds left in the
+            current turn. Returning with any less than 0 ms remaining forfeits
+            the game.
+
+        Returns
+        -------
+        (int, int)
+            Board coordinates corresponding to a legal move; may return
+            (-1, -1) if there are no available legal moves.
+        """
+        start_ns = time.perf_counter_ns()
+        self.time_left = time_left
+        self.clock = SearchClock(time_left, self.TIMER_THRESHOLD)
+        start_counts = self.clock.counts()
+        # Free what is left of the tree before two moves ago now, while the
+        # search can still adapt to the time it takes
+        self._discarded = None
+        self._geometry = game._geometry
+        root = self._reuse_tree(game)
+        # Freeing the rest of the previous tree can take milliseconds, so
+        # it is kept alive until the opponent's turn starts
+        self._discarded, self._root = self._root, None
+        state = self._state(game)
+        self._max_depth = 0
+
+        # A full garbage collection pass over a large tree takes longer
+        # than the timer threshold, and every node allocated by the search
+        # can trigger one. The nodes form no reference cycles (they are
+        # freed by reference counting), so full passes are put off until
+        # the search ends; the thresholds are process-wide, so this also
+        # delays (but does not skip) collections for other threads.
+        thresholds = gc.get_threshold()
+        gc.set_threshold(thresholds[0], thresholds[1], self.GC_THRESHOLD)
+        try:
+            while root.untried or root.children:
+                if (self.max_simulations is not None and
+                        self.clock.leaves >= self.max_simulations):
+                    break
+                self.clock.tick()
+                self._simulate(root, state)
+        except SearchTimeout:
+            pass
+        finally:
+            gc.set_threshold(*thresholds)
+
+        best = max(root.children, key=lambda child: child.visits,
+                   default=None)
+        if best is not None:
+            move = best.move
+        elif root.untried:
+            move = root.untried[-1]
+        else:
+            move = None
+        self._root = root
+        self._root_state = (game._geometry, game.move_count, state)
+        self.move_stats.append(
+            self.clock.stats(start_counts, self._max_depth, start_ns))
+        return (-1, -1) if move is None else self._geometry.coords[move]
+
+    def opponent_turn_started(self, game):
+        """Called by `Board.play()` when the opponent's turn starts, before
+        their clock runs; frees the part of the previous search tree that
+        the move played left unreachable.
+        """
+        self._discarded = None
+
+    def _reuse_tree(self, game):
+        """Return the node of the previous search tree reached by the moves
+        played since the previous search, or a new root node for `game`.
+        """
+        blocked, locs, turn = state = self._state(game)
+        node = self._root
+        if node is not None:
+            geometry, old_count, (old_blocked, old_locs, mover) = self._root_state
+            plies = game.move_count - old_count
+            if geometry is game._geometry and 0 <= plies <= 2:
+                # Each player moved at most once since, so the moves played
+                # are their current locations
+                old_locs = list(old_locs)
+                for _ in range(plies):
+                    move = locs[mover]
+                    node = next((child for child in node.children
+                                 if child.move == move), None)
+                    if node is None:
+                        break
+                    old_blocked |= 1 << move
+                    old_locs[mover] = move
+                    mover ^= 1
+                if node is not None and (old_blocked, tuple(old_locs),
+                                         mover) == state:
+                    return node
+        return _MCTSNode(None, turn ^ 1, self._moves(blocked, locs[turn]))
+
+    @staticmethod
+    def _state(game):
+        """Return the (blocked cells, player locations, initiative) state of
+        `game` that simulations start from.
+        """
+        return game._blocked, (game._p1_loc, game._p2_loc), game._initiative
+
+    def _moves(self, blocked, loc):
+        """Return the list of open cells a player at `loc` can move to, in
+        random order.
+        """
+        geometry = self._geometry
+        if loc is None:
+            moves = [idx for idx in range(geometry.size)
+                     if not blocked >> idx & 1]
+        else:
+            moves = [idx for idx in geometry.neighbor_indices[loc]
+                     if not blocked >> idx & 1]
+        self._rng.shuffle(moves)
+        return moves
+
+    def _simulate(self, root, state):
+        """Run one simulation from `root`: select a path down the tree by
+        UCT, expand one untried move, play out the rest of the game and
+        update the statistics of the nodes on the path.
+        """
+        blocked, (loc_1, loc_2), turn = state
+        locs = [loc_1, loc_2]
+        path = [root]
+        node = root
+        exploration = self.exploration
+        while not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            best_value = -1.
+            for child in node.children:
+                value = (child.wins / child.visits + exploration *
+                         math.sqrt(log_visits / child.visits))
+                if value > best_value:
+                    best_value, node = value, child
+            blocked |= 1 << node.move
+            locs[turn] = node.move
+            turn ^= 1
+            path.append(node)
+        if node.untried:
+            move = node.untried.pop()
+            blocked |= 1 << move
+            locs[turn] = move
+            child = _MCTSNode(move, turn, None)
+            turn ^= 1
+            child.untried = self._moves(blocked, locs[turn])
+            node.children.append(child)
+            path.append(child)
+        # The root is at depth 0, as in the other players' statistics
+        depth = len(path) - 1
+        if depth > self._max_depth:
+            self._max_depth = depth
+
+        loser = self._rollout(blocked, locs, turn)
+        self.clock.leaves += 1
+        for node in path:
+            node.visits += 1
+            if node.player != loser:
+                node.wins += 1
+
+    def _rollout(self, blocked, locs, turn):
+        """Play the rollout policy from the given state until a player
+        cannot move, and return that player (0 or 1).
+        """
+        geometry = self._geometry
+        move_masks = geometry.move_masks
+        random = self._rng.random
+        mobility = self.rollout == self.ROLLOUT_MOBILITY
+        while True:
+            loc = locs[turn]
+            if loc is None:
+                moves = geometry.full_mask & ~blocked
+            else:
+                moves = move_masks[loc] & ~blocked
+            if not moves:
+                return turn
+            count = popcount(moves)
+            # Pick a random set bit of the move mask
+            bit = self._nth_bit(moves, int(random() * count))
+            if mobility and count > 1:
+                other = self._nth_bit(moves, int(random() * count))
+                open_mask = ~(blocked | bit | other)
+                if (popcount(move_masks[other.bit_length() - 1] & open_mask) >
+                        popcount(move_masks[bit.bit_length() - 1] & open_mask)):
+                    bit = other
+            blocked |= bit
+            locs[turn] = bit.bit_length() - 1
+            turn ^= 1
+
+    @staticmethod
+    def _nth_bit(mask, n):
+        """Return the `n`-th lowest set bit of `mask` (as a mask)."""
+        while n:
+            mask &= mask - 1
+            n -= 1
+        return mask & -mask
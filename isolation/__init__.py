@@ -8,4 +8,11 @@ legal moves loses, and the opponent is declared the winner.
 """
 
 # Make the Board class available at the root of the module for imports
-from .isolation import Board
+from .isolation import Board, Deadline
+from .endgame import LongestPathSolver
+
+# BoardBatch requires numpy, which is optional for the rest of the package
+try:
+    from .batch import BoardBatch
+except ImportError:
+    pass
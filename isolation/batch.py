@@ -0,0 +1,176 @@
+"""
+This file contains the `BoardBatch` class, which stores many games of
+Isolation as NumPy arrays so that legal moves, random move selection and
+terminal tests run as one vectorized step for every game in the batch
+(e.g., for random playouts or dataset generation).
+"""
+import numpy as np
+
+from .isolation import Board, get_geometry
+
+
+class BoardBatch(object):
+    """Vectorized state for `num_games` simultaneous games of knight's
+    Isolation on boards of the same size.
+
+    Cells use the same column-major numbering as `isolation.Board`
+    (``idx = row + col * height``), and moves are passed and returned as
+    cell indices; -1 means "no move".
+
+    Parameters
+    ----------
+    num_games : int
+        The number of games in the batch, all starting from an empty board.
+
+    width : int (optional)
+        The number of columns that the boards should have.
+
+    height : int (optional)
+        The number of rows that the boards should have.
+
+    seed : int (optional)
+        Seed for the NumPy random generator used to select random moves.
+    """
+    NO_MOVE = -1
+
+    def __init__(self, num_games, width=7, height=7, seed=None):
+        self.width = width
+        self.height = height
+        self.num_games = num_games
+        self._geometry = geometry = get_geometry(width, height)
+        size = geometry.size
+
+        # Knight neighbors of every cell, padded with the index of an extra
+        # cell (`size`) that is always blocked
+        self._neighbors = np.full((size, 8), size, dtype=np.intp)
+        for idx, neighbors in enumerate(geometry.neighbor_indices):
+            self._neighbors[idx, :len(neighbors)] = neighbors
+
+        self.blocked = np.zeros((num_games, size + 1), dtype=bool)
+        self.blocked[:, size] = True
+        # Cell index of player 1 and player 2 in each game (-1 if not placed)
+        self.locations = np.full((num_games, 2), BoardBatch.NO_MOVE,
+                                 dtype=np.intp)
+        # Index (0 or 1) of the player to move in each game
+        self.initiative = np.zeros(num_games, dtype=np.intp)
+        self.move_count = np.zeros(num_games, dtype=np.intp)
+        self._rows = np.arange(num_games)
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_boards(cls, boards):
+        """Build a batch from a sequence of `isolation.Board` objects of the
+        same size.
+        """
+        boards = list(boards)
+        batch = cls(len(boards), boards[0].width, boards[0].height)
+        for i, board in enumerate(boards):
+            if (board.width, board.height) != (batch.width, batch.height):
+                raise ValueError("All boards in a batch must have the same size.")
+            cells = [idx for idx in range(batch._geometry.size)
+                     if board._blocked >> idx & 1]
+            batch.blocked[i, cells] = True
+            for j, loc in enumerate((board._p1_loc, board._p2_loc)):
+                if loc is not Board.NOT_MOVED:
+                    batch.locations[i, j] = loc
+            batch.initiative[i] = board._initiative
+            batch.move_count[i] = board.move_count
+        return batch
+
+    def to_board(self, index, player_1, player_2):
+        """Return the game at position `index` of the batch as an
+        `isolation.Board` played by `player_1` and `player_2`.
+        """
+        board = Board(player_1, player_2, self.width, self.height)
+        blocked = 0
+        for idx in np.flatnonzero(self.blocked[index, :-1]):
+            blocked |= 1 << int(idx)
+        board._blocked = blocked
+        p1_loc, p2_loc = (int(loc) for loc in self.locations[index])
+        board._p1_loc = Board.NOT_MOVED if p1_loc < 0 else p1_loc
+        board._p2_loc = Board.NOT_MOVED if p2_loc < 0 else p2_loc
+        board._initiative = int(self.initiative[index])
+        if board._initiative:
+            board._active_player, board._inactive_player = player_2, player_1
+        board.move_count = int(self.move_count[index])
+        board._hash = board._full_hash()
+        return board
+
+    def legal_moves(self):
+        """Return a boolean array of shape (num_games, width * height) that
+        is True for every legal move of the active player in each game.
+        """
+        size = self._geometry.size
+        active = self.locations[self._rows, self.initiative]
+        placed = active >= 0
+
+        legal = np.zeros((self.num_games, size + 1), dtype=bool)
+        # Players who have not moved yet may move to any open cell
+        legal[~placed] = ~self.blocked[~placed]
+        rows = self._rows[placed]
+        neighbors = self._neighbors[active[placed]]
+        legal[rows[:, None], neighbors] = ~self.blocked[rows[:, None], neighbors]
+        return legal[:, :size]
+
+    def count_legal_moves(self):
+        """Return the number of legal moves of the active player in each
+        game.
+        """
+        return self.legal_moves().sum(axis=1)
+
+    def is_over(self):
+        """Return a boolean array that is True for every game where the
+        active player has no legal moves left.
+        """
+        return ~self.legal_moves().any(axis=1)
+
+    def winners(self):
+        """Return, for every finished game, the index of the winner (0 for
+        player 1 and 1 for player 2), or -1 for games still in progress.
+        """
+        return np.where(self.is_over(), self.initiative ^ 1, -1)
+
+    def apply_moves(self, moves):
+        """Apply one move (cell index) to every game in the batch. Games
+        where the move is -1 are left unchanged; moves are assumed legal.
+        """
+        moves = np.asarray(moves, dtype=np.intp)
+        rows = self._rows[moves >= 0]
+        moves = moves[rows]
+        self.blocked[rows, moves] = True
+        self.locations[rows, self.initiative[rows]] = moves
+        self.initiative[rows] ^= 1
+        self.move_count[rows] += 1
+
+    def random_moves(self):
+        """Return a uniformly random legal move (cell index) for the active
+        player in each game, or -1 where the game is over.
+        """
+        legal = self.legal_moves()
+        weights = self._rng.random(legal.shape) + legal
+        moves = weights.argmax(axis=1)
+        moves[~legal.any(axis=1)] = BoardBatch.NO_MOVE
+        return moves
+
+    def playout(self):
+        """Play random moves in every game until all of them are over.
+
+        Returns
+        -------
+        numpy.ndarray
+            The index of the winner (0 for player 1, 1 for player 2) of each
+            game.
+        """
+        while True:
+            moves = self.random_moves()
+            if (moves < 0).all():
+                return self.initiative ^ 1
+            self.apply_moves(moves)
+
+    def move_to_coords(self, move):
+        """Convert a cell index into a coordinate pair (row, column)."""
+        return self._geometry.coords[int(move)]
+
+    def coords_to_move(self, move):
+        """Convert a coordinate pair (row, column) into a cell index."""
+        return move[0] + move[1] * self.height
@@ -0,0 +1,159 @@
+"""
+This file contains the binary format of opening books for Isolation and the
+`OpeningBook` class, which looks moves up in a book file through `mmap`.
+
+A book maps the canonical form (see `Board.canonical()`) of every position
+of the first few plies to the move to play in it, so positions equivalent
+under the board symmetries share one entry. The file is a fixed-width header
+(board size and number of plies covered) followed by fixed-width entries
+sorted by the Zobrist hash of the canonical position, which a lookup finds
+by binary search without loading the book into memory. Books are built
+offline by `build_book.py`.
+"""
+import mmap
+import struct
+
+from .isolation import Board
+
+MAGIC = b"ISOBOOK1"
+
+_HEADER = struct.Struct("<8sBBB5x")
+_ENTRY = struct.Struct("<QBB")
+_KEY = struct.Struct("<Q")
+
+
+def opening_positions(width=7, height=7, plies=3):
+    """Return the move sequences leading to one representative of every
+    class of equivalent positions in the first `plies` plies of a game, by
+    increasing number of moves.
+    """
+    game = Board("Player1", "Player2", width, height,
+                 move_order=Board.DETERMINISTIC)
+    positions = [[]]
+    frontier = [[]]
+    for _ in range(plies - 1):
+        seen = set()
+        next_frontier = []
+        for moves in frontier:
+            for move in _replay(game, moves).get_legal_moves():
+                line = moves + [move]
+                key = _replay(game, line).canonical()[0].hash()
+                if key not in seen:
+                    seen.add(key)
+                    next_frontier.append(line)
+        positions.extend(next_frontier)
+        frontier = next_frontier
+    return positions
+
+
+def _replay(game, moves):
+    """Return a copy of `game` with `moves` applied."""
+    game = game.copy()
+    for move in moves:
+        game.apply_move(move)
+    return game
+
+
+def write_book(path, width, height, plies, entries):
+    """Write a book file.
+
+    Parameters
+    ----------
+    path : str
+        The path of the book file; it is replaced if it exists.
+
+    width, height : int
+        The size of the board.
+
+    plies : int
+        The number of plies from the start of the game the book covers.
+
+    entries : iterable<(int, (int, int), int)>
+        The (canonical position hash, move on the canonical board, search
+        depth) of every position. When several entries have the same
+        position, the deepest is kept.
+    """
+    if width * height > 256:
+        raise ValueError("Boards with more than 256 cells cannot be stored.")
+    best = {}
+    for key, move, depth in entries:
+        if key not in best or depth > best[key][1]:
+            best[key] = (move[0] + move[1] * height, depth)
+    with open(path, "wb") as book:
+        book.write(_HEADER.pack(MAGIC, width, height, plies))
+        for key in sorted(best):
+            book.write(_ENTRY.pack(key, *best[key]))
+
+
+class OpeningBook(object):
+    """A book file written by `write_book()`, opened through `mmap` on the
+    first lookup.
+
+    Parameters
+    ----------
+    path : str
+        The path of the book file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.width = self.height = self.plies = None
+        self._file = self._map = None
+        self._count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        if self._map is None:
+            self._open()
+        return self._count
+
+    def lookup(self, game):
+        """Return the book move (row, column) for the position of `game`, or
+        None if the position is not in the book.
+        """
+        if self._map is None:
+            self._open()
+        if (game.move_count >= self.plies or game.width != self.width or
+                game.height != self.height):
+            return None
+        board, transform = game.canonical()
+        key = board.hash()
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _KEY.unpack_from(self._map, _HEADER.size +
+                                mid * _ENTRY.size)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self._count:
+            return None
+        entry_key, idx, _ = _ENTRY.unpack_from(
+            self._map, _HEADER.size + lo * _ENTRY.size)
+        if entry_key != key:
+            return None
+        return game.transform_move((idx % self.height, idx // self.height),
+                                   transform, inverse=True)
+
+    def close(self):
+        """Release the memory map of the book file."""
+        for handle in (self._map, self._file):
+            if handle is not None:
+                handle.close()
+        self._file = self._map = None
+
+    def _open(self):
+        """Map the book file and read its header."""
+        self._file = open(self.path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.height, self.plies = _HEADER.unpack_from(
+            self._map)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("{} is not an opening book.".format(self.path))
+        self._count = (len(self._map) - _HEADER.size) // _ENTRY.size
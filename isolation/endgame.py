@@ -0,0 +1,148 @@
+"""
+This file contains the `LongestPathSolver` class, an exact solver for the
+endgame of Isolation once the two players are in separate regions of the
+board (see `Board.is_partitioned()`). From then on the players cannot
+interfere with each other, and each one can make exactly as many more moves
+as the longest knight path through the open cells of their own region.
+"""
+from .isolation import Board, flood_fill, iter_bits, popcount
+
+
+class LongestPathSolver(object):
+    """Compute longest knight paths by depth-first search, memoized on the
+    (location, region bitmask) of every subproblem.
+
+    Subproblems only depend on the player location and the cells still
+    reachable from it, so the memo stays valid across moves and games on
+    boards of the same size.
+
+    Parameters
+    ----------
+    max_entries : int (optional)
+        The memo is cleared when it grows beyond this many entries.
+    """
+
+    def __init__(self, max_entries=500000):
+        self.max_entries = max_entries
+        self._memo = {}
+        self._tick = None
+
+    def solve(self, game, player=None, tick=None, target=None):
+        """Return the length of the longest path the specified player can
+        still walk, and the first move of such a path, ignoring the opponent
+        (which is exact when the board is partitioned).
+
+        Parameters
+        ----------
+        game : isolation.Board
+            The current game state; the player must have been placed.
+
+        player : object (optional)
+            A player registered in the game; the active player if None.
+
+        tick : callable (optional)
+            Called once for every subproblem expanded, e.g. to raise a
+            timeout exception when the search runs out of time.
+
+        target : int (optional)
+            Stop as soon as a path of at least `target` moves is found, in
+            which case the returned length is only a lower bound. Deciding
+            whether a player can outlast the opponent this way is much
+            cheaper than finding the longest path in a large region.
+
+        Returns
+        -------
+        (int, (int, int))
+            The number of moves left on the longest path and its first move
+            (row, column); the move is (-1, -1) if the player cannot move.
+        """
+        if player is None:
+            player = game.active_player
+        loc = game._location_index(player)
+        if loc is Board.NOT_MOVED:
+            raise ValueError("The player must be placed on the board.")
+        if len(self._memo) > self.max_entries:
+            self._memo.clear()
+        self._tick = tick
+        self._geometry = geometry = game._geometry
+
+        region = flood_fill(geometry.move_masks, loc, game._open_mask())
+        need = float("inf") if target is None else target
+        best_length, best_move = 0, (-1, -1)
+        for idx, rest in self._children(loc, region):
+            length = 1 + self._longest(idx, rest, need - 1)
+            if length > best_length:
+                best_length, best_move = length, geometry.coords[idx]
+                if best_length >= need:
+                    break
+        return best_length, best_move
+
+    def upper_bound(self, game, player=None):
+        """Return an upper bound on the number of moves the specified player
+        can still make, computed without searching.
+        """
+        if player is None:
+            player = game.active_player
+        loc = game._location_index(player)
+        self._geometry = geometry = game._geometry
+        return self._upper_bound(
+            loc, flood_fill(geometry.move_masks, loc, game._open_mask()))
+
+    def _children(self, loc, region):
+        """Yield (cell index, region left) for every move from `loc` into
+        `region`, trying the most constrained cells first (Warnsdorff's
+        rule, which finds long paths early).
+        """
+        move_masks = self._geometry.move_masks
+        moves = sorted(iter_bits(move_masks[loc] & region),
+                       key=lambda i: popcount(move_masks[i] & region))
+        for idx in moves:
+            yield idx, flood_fill(move_masks, idx, region & ~(1 << idx))
+
+    def _upper_bound(self, loc, region):
+        """Return an upper bound on the length of a path from `loc` through
+        `region`.
+        """
+        geometry = self._geometry
+        # Knight paths alternate colors, so a path from `loc` can use at
+        # most one more cell of the opposite color than of its own color
+        own = 0 if geometry.color_masks[0] >> loc & 1 else 1
+        same = popcount(region & geometry.color_masks[own])
+        other = popcount(region & geometry.color_masks[1 - own])
+        bound = 2 * min(same, other) + (1 if other > same else 0)
+
+        # A cell with a single neighbor can only be the last one on the path
+        move_masks = geometry.move_masks
+        graph = region | 1 << loc
+        dead_ends = sum(1 for idx in iter_bits(region)
+                        if popcount(move_masks[idx] & graph) < 2)
+        return min(bound, same + other - max(0, dead_ends - 1))
+
+    def _longest(self, loc, region, need):
+        """Return the number of moves on the longest path from `loc` through
+        `region`, the cells reachable from `loc` (excluding `loc` itself),
+        or any length of at least `need` as soon as one is found.
+        """
+        key = (loc, region)
+        length = self._memo.get(key)
+        if length is not None:
+            return length
+        if self._tick is not None:
+            self._tick()
+
+        bound = self._upper_bound(loc, region)
+        length = 0
+        exact = True
+        for idx, rest in self._children(loc, region):
+            child_length = 1 + self._longest(idx, rest, need - 1)
+            if child_length > length:
+                length = child_length
+                if length >= bound:
+                    break
+                if length >= need:
+                    # Cut short, so only a lower bound: not memoized
+                    exact = False
+                    break
+        if exact:
+            self._memo[key] = length
+        return length
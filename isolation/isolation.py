@@ -8,11 +8,180 @@ remain compatible with the defaults provided, and none of your changes will
 be available to project reviewers.
 """
 import random
-import timeit
-from copy import copy
+import time
 
 TIME_LIMIT_MILLIS = 150
 
+# (row, column) offsets of the eight L-shaped knight moves
+KNIGHT_DIRECTIONS = ((-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                     (1, -2), (1, 2), (2, -1), (2, 1))
+
+_GEOMETRIES = {}
+
+
+class Deadline(object):
+    """A per-move deadline read from the monotonic nanosecond clock.
+
+    Calling a Deadline returns the number of milliseconds left, so it can be
+    passed anywhere a `time_left` callable is expected. Search code that
+    polls the clock often can use `remaining_ns()` to skip the conversion.
+
+    Parameters
+    ----------
+    time_limit : numeric
+        The number of milliseconds until the deadline (may be infinite).
+
+    per_move : bool (optional)
+        False if the time left is the player's time for the rest of the
+        game (chess clock) rather than for the current move only.
+    """
+    __slots__ = ("expires_ns", "per_move")
+
+    def __init__(self, time_limit, per_move=True):
+        self.expires_ns = time.perf_counter_ns() + time_limit * 1e6
+        self.per_move = per_move
+
+    def __call__(self):
+        return (self.expires_ns - time.perf_counter_ns()) / 1e6
+
+    def remaining_ns(self):
+        """Return the number of nanoseconds left before the deadline."""
+        return self.expires_ns - time.perf_counter_ns()
+
+
+class _Geometry(object):
+    """Lookup tables shared by every board with the same dimensions.
+
+    Cells are numbered column-major (``idx = row + col * height``), which is
+    the layout used by the original list-based board, so bit ``idx`` of a
+    mask refers to the cell at ``(idx % height, idx // height)``.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.full_mask = (1 << self.size) - 1
+        self.coords = tuple((idx % height, idx // height)
+                            for idx in range(self.size))
+        # Cells of each square color; a knight always changes color
+        self.color_masks = tuple(
+            sum(1 << idx for idx, (r, c) in enumerate(self.coords)
+                if (r + c) % 2 == color)
+            for color in (0, 1))
+        self.move_masks = tuple(self._knight_mask(r, c)
+                                for r, c in self.coords)
+        self.neighbor_indices = tuple(tuple(iter_bits(mask))
+                                      for mask in self.move_masks)
+
+        # For every knight direction, the cells it can be played from and
+        # the bit shift that maps them to the destination cells
+        self.knight_shifts = tuple(
+            (sum(1 << idx for idx, (r, c) in enumerate(self.coords)
+                 if 0 <= r + dr < height and 0 <= c + dc < width),
+             dr + dc * height)
+            for dr, dc in KNIGHT_DIRECTIONS)
+
+        # For every cell, the (bit, (row, col)) pairs of the in-bounds knight
+        # moves in KNIGHT_DIRECTIONS order
+        self.neighbors = tuple(
+            tuple((1 << (r + dr + (c + dc) * height), (r + dr, c + dc))
+                  for dr, dc in KNIGHT_DIRECTIONS
+                  if 0 <= r + dr < height and 0 <= c + dc < width)
+            for r, c in self.coords)
+
+        # Zobrist keys for blocked cells, each player's location and the
+        # side to move. The generator is seeded from the board size so
+        # hashes are reproducible across processes and runs; keys are 60
+        # bits wide so that hash() leaves them unchanged on 64-bit builds.
+        rng = random.Random("zobrist-{}x{}".format(width, height))
+        self.cell_keys = tuple(rng.getrandbits(60) for _ in range(self.size))
+        self.p1_keys = tuple(rng.getrandbits(60) for _ in range(self.size))
+        self.p2_keys = tuple(rng.getrandbits(60) for _ in range(self.size))
+        self.side_key = rng.getrandbits(60)
+
+        # Symmetries of the board that map knight moves to knight moves, as
+        # cell index permutations (the identity first): the 8 rotations and
+        # reflections of a square board, or the 4 of a rectangular one
+        self.symmetries = tuple(
+            tuple(r2 + c2 * height for r2, c2 in (t(r, c) for r, c in self.coords))
+            for t in self._symmetry_maps())
+        self.inverse_symmetries = tuple(
+            self.symmetries.index(tuple(perm.index(idx) for idx in range(self.size)))
+            for perm in self.symmetries)
+
+    def knight_step(self, mask):
+        """Return the bitmask of cells one knight move away from any cell in
+        `mask`, using one shift per direction instead of one lookup per cell.
+        """
+        step = 0
+        for sources, shift in self.knight_shifts:
+            if shift >= 0:
+                step |= (mask & sources) << shift
+            else:
+                step |= (mask & sources) >> -shift
+        return step
+
+    def _symmetry_maps(self):
+        h, w = self.height - 1, self.width - 1
+        maps = [lambda r, c: (r, c),
+                lambda r, c: (h - r, c),
+                lambda r, c: (r, w - c),
+                lambda r, c: (h - r, w - c)]
+        if self.width == self.height:
+            maps += [lambda r, c: (c, r),
+                     lambda r, c: (c, h - r),
+                     lambda r, c: (w - c, r),
+                     lambda r, c: (w - c, h - r)]
+        return maps
+
+    def _knight_mask(self, r, c):
+        mask = 0
+        for dr, dc in KNIGHT_DIRECTIONS:
+            if 0 <= r + dr < self.height and 0 <= c + dc < self.width:
+                mask |= 1 << (r + dr + (c + dc) * self.height)
+        return mask
+
+
+def get_geometry(width, height):
+    """Return the (cached) lookup tables for a board of the given size."""
+    key = (width, height)
+    geometry = _GEOMETRIES.get(key)
+    if geometry is None:
+        geometry = _GEOMETRIES[key] = _Geometry(width, height)
+    return geometry
+
+
+def iter_bits(mask):
+    """Yield the index of every set bit in `mask`, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def flood_fill(move_masks, idx, open_mask):
+    """Return the bitmask of cells in `open_mask` reachable from the cell
+    index `idx` through knight moves that only land on cells in `open_mask`.
+    """
+    reached = 0
+    frontier = move_masks[idx] & open_mask
+    while frontier:
+        reached |= frontier
+        step = 0
+        for i in iter_bits(frontier):
+            step |= move_masks[i]
+        frontier = step & open_mask & ~reached
+    return reached
+
+
+try:
+    popcount = int.bit_count
+except AttributeError:  # Python < 3.10
+    def popcount(mask):
+        """Return the number of set bits in `mask`."""
+        return bin(mask).count("1")
+
 
 class Board(object):
     """Implement a model for the game Isolation assuming each player moves like
@@ -33,11 +202,36 @@ class Board(object):
 
     height : int (optional)
         The number of rows that the board should have.
+
+    move_order : str or callable (optional)
+        The order in which get_legal_moves() returns knight moves. SHUFFLED
+        (the default) shuffles them with the board's random generator,
+        DETERMINISTIC returns them in the fixed KNIGHT_DIRECTIONS order, and
+        a callable receives the list of moves and returns them reordered.
+
+    seed : hashable (optional)
+        Seed for the random generator used by the SHUFFLED move order. The
+        generator is shared by all copies of the board, so a seeded game and
+        every search over it are reproducible. If None, the global `random`
+        module generator is used.
+
+    track_mobility : bool (optional)
+        If True, the board keeps the number of open knight moves from every
+        cell up to date in apply_move(), so count_legal_moves() is a table
+        lookup. This makes copies slightly more expensive.
     """
+    __slots__ = ("width", "height", "move_count", "_player_1", "_player_2",
+                 "_active_player", "_inactive_player", "_geometry",
+                 "_move_order", "_rng", "_blocked", "_p1_loc", "_p2_loc",
+                 "_initiative", "_hash", "_undo", "_mobility")
+
     BLANK = 0
     NOT_MOVED = None
+    SHUFFLED = "shuffled"
+    DETERMINISTIC = "deterministic"
 
-    def __init__(self, player_1, player_2, width=7, height=7):
+    def __init__(self, player_1, player_2, width=7, height=7,
+                 move_order=SHUFFLED, seed=None, track_mobility=False):
         self.width = width
         self.height = height
         self.move_count = 0
@@ -45,15 +239,49 @@ class Board(object):
         self._player_2 = player_2
         self._active_player = player_1
         self._inactive_player = player_2
-
-        # The last 3 entries of the board state includes initiative (0 for
-        # player 1, 1 for player 2) player 2 last move, and player 1 last move
-        self._board_state = [Board.BLANK] * (width * height + 3)
-        self._board_state[-1] = Board.NOT_MOVED
-        self._board_state[-2] = Board.NOT_MOVED
+        self._geometry = get_geometry(width, height)
+
+        if move_order not in (Board.SHUFFLED, Board.DETERMINISTIC) and \
+                not callable(move_order):
+            raise ValueError("Unknown move order: {!r}".format(move_order))
+        self._move_order = move_order
+        self._rng = random if seed is None else random.Random(seed)
+
+        # The board state is a bitmask of blocked cells, the cell index of
+        # each player (NOT_MOVED until placed) and the initiative (0 for
+        # player 1, 1 for player 2)
+        self._blocked = 0
+        self._p1_loc = Board.NOT_MOVED
+        self._p2_loc = Board.NOT_MOVED
+        self._initiative = 0
+
+        # Zobrist hash of the state, updated incrementally by apply_move()
+        self._hash = 0
+
+        # Undo records for push_move()/pop_move(), created on first use
+        self._undo = None
+
+        # Number of open knight moves from each cell, if tracked
+        self._mobility = None
+        if track_mobility:
+            self._mobility = bytearray(
+                len(n) for n in self._geometry.neighbor_indices)
 
     def hash(self):
-        return str(self._board_state).__hash__()
+        return self._hash
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if not isinstance(other, Board):
+            return NotImplemented
+        return (self._hash == other._hash and
+                self._blocked == other._blocked and
+                self._p1_loc == other._p1_loc and
+                self._p2_loc == other._p2_loc and
+                self._initiative == other._initiative and
+                self._geometry is other._geometry)
 
     @property
     def active_player(self):
@@ -92,11 +320,25 @@ class Board(object):
 
     def copy(self):
         """ Return a deep copy of the current board. """
-        new_board = Board(self._player_1, self._player_2, width=self.width, height=self.height)
+        new_board = object.__new__(self.__class__)
+        new_board.width = self.width
+        new_board.height = self.height
         new_board.move_count = self.move_count
+        new_board._player_1 = self._player_1
+        new_board._player_2 = self._player_2
         new_board._active_player = self._active_player
         new_board._inactive_player = self._inactive_player
-        new_board._board_state = copy(self._board_state)
+        new_board._geometry = self._geometry
+        new_board._move_order = self._move_order
+        new_board._rng = self._rng
+        new_board._blocked = self._blocked
+        new_board._p1_loc = self._p1_loc
+        new_board._p2_loc = self._p2_loc
+        new_board._initiative = self._initiative
+        new_board._hash = self._hash
+        new_board._undo = None
+        new_board._mobility = (None if self._mobility is None
+                               else bytearray(self._mobility))
         return new_board
 
     def forecast_move(self, move):
@@ -134,13 +376,13 @@ class Board(object):
         """
         idx = move[0] + move[1] * self.height
         return (0 <= move[0] < self.height and 0 <= move[1] < self.width and
-                self._board_state[idx] == Board.BLANK)
+                not self._blocked >> idx & 1)
 
     def get_blank_spaces(self):
         """Return a list of the locations that are still available on the board.
         """
-        return [(i, j) for j in range(self.width) for i in range(self.height)
-                if self._board_state[i + j * self.height] == Board.BLANK]
+        coords = self._geometry.coords
+        return [coords[idx] for idx in iter_bits(self._open_mask())]
 
     def get_player_location(self, player):
         """Find the current location of the specified player on the board.
@@ -156,20 +398,10 @@ class Board(object):
             The coordinate pair (row, column) of the input player, or None
             if the player has not moved.
         """
-        if player == self._player_1:
-            if self._board_state[-1] == Board.NOT_MOVED:
-                return Board.NOT_MOVED
-            idx = self._board_state[-1]
-        elif player == self._player_2:
-            if self._board_state[-2] == Board.NOT_MOVED:
-                return Board.NOT_MOVED
-            idx = self._board_state[-2]
-        else:
-            raise RuntimeError(
-                "Invalid player in get_player_location: {}".format(player))
-        w = idx // self.height
-        h = idx % self.height
-        return (h, w)
+        idx = self._location_index(player)
+        if idx is Board.NOT_MOVED:
+            return Board.NOT_MOVED
+        return self._geometry.coords[idx]
 
     def get_legal_moves(self, player=None):
         """Return the list of all legal moves for the specified player.
@@ -187,8 +419,67 @@ class Board(object):
             for the player constrained by the current game state.
         """
         if player is None:
-            player = self.active_player
-        return self.__get_moves(self.get_player_location(player))
+            idx = self._p2_loc if self._initiative else self._p1_loc
+        else:
+            idx = self._location_index(player)
+        return self.__get_moves(idx)
+
+    def count_legal_moves(self, player=None):
+        """Return the number of legal moves for the specified player without
+        building the list of moves.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            count the legal moves for the active player on the board.
+
+        Returns
+        -------
+        int
+            The number of legal moves, i.e., len(self.get_legal_moves(player))
+        """
+        if player is None:
+            idx = self._p2_loc if self._initiative else self._p1_loc
+        else:
+            idx = self._location_index(player)
+        if idx is Board.NOT_MOVED:
+            return popcount(self._open_mask())
+        if self._mobility is not None:
+            return self._mobility[idx]
+        return popcount(self._geometry.move_masks[idx] & ~self._blocked)
+
+    def count_child_moves(self, moves):
+        """Return the number of legal moves of both players after each of
+        the active player's `moves`, without creating the child boards.
+
+        Parameters
+        ----------
+        moves : list<(int, int)>
+            Legal moves (row, column) of the active player.
+
+        Returns
+        -------
+        (list<int>, list<int>)
+            For every move, the number of legal moves of the player making
+            it, and of their opponent (the active player after the move).
+        """
+        height = self.height
+        move_masks = self._geometry.move_masks
+        blocked = self._blocked
+        opp_loc = self._p1_loc if self._initiative else self._p2_loc
+        if opp_loc is Board.NOT_MOVED:
+            opp_mask = self._open_mask()
+        else:
+            opp_mask = move_masks[opp_loc] & ~blocked
+        opp_count = popcount(opp_mask)
+        own_counts = []
+        opp_counts = []
+        for row, col in moves:
+            idx = row + col * height
+            own_counts.append(popcount(move_masks[idx] & ~blocked))
+            opp_counts.append(opp_count - (opp_mask >> idx & 1))
+        return own_counts, opp_counts
 
     def apply_move(self, move):
         """Move the active player to a specified location.
@@ -200,20 +491,187 @@ class Board(object):
             the active player on the board.
         """
         idx = move[0] + move[1] * self.height
-        last_move_idx = int(self.active_player == self._player_2) + 1
-        self._board_state[-last_move_idx] = idx
-        self._board_state[idx] = 1
-        self._board_state[-3] ^= 1
+        geometry = self._geometry
+        if self._initiative:
+            keys, prev = geometry.p2_keys, self._p2_loc
+            self._p2_loc = idx
+        else:
+            keys, prev = geometry.p1_keys, self._p1_loc
+            self._p1_loc = idx
+        h = self._hash ^ keys[idx] ^ geometry.side_key
+        if prev is not Board.NOT_MOVED:
+            h ^= keys[prev]
+        if not self._blocked >> idx & 1:
+            h ^= geometry.cell_keys[idx]
+            if self._mobility is not None:
+                mobility = self._mobility
+                for n in geometry.neighbor_indices[idx]:
+                    mobility[n] -= 1
+        self._hash = h
+        self._blocked |= 1 << idx
+        self._initiative ^= 1
         self._active_player, self._inactive_player = self._inactive_player, self._active_player
         self.move_count += 1
 
+    def push_move(self, move):
+        """Apply a move in-place like apply_move(), but remember enough of
+        the previous state that pop_move() can undo it.
+
+        Search code can use push_move()/pop_move() pairs to walk the game
+        tree on a single board instead of creating a copy per node with
+        forecast_move().
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        if self._undo is None:
+            self._undo = []
+        self._undo.append((self._p2_loc if self._initiative else self._p1_loc,
+                           self._blocked, self._hash))
+        self.apply_move(move)
+
+    def pop_move(self):
+        """Undo the most recent move applied with push_move().
+
+        Returns
+        -------
+        (int, int)
+            The coordinate pair (row, column) of the move that was undone.
+        """
+        if not self._undo:
+            raise RuntimeError("No move applied with push_move() to undo.")
+        prev_loc, prev_blocked, prev_hash = self._undo.pop()
+        self._initiative ^= 1
+        if self._initiative:
+            idx, self._p2_loc = self._p2_loc, prev_loc
+        else:
+            idx, self._p1_loc = self._p1_loc, prev_loc
+        if self._mobility is not None and not prev_blocked >> idx & 1:
+            mobility = self._mobility
+            for n in self._geometry.neighbor_indices[idx]:
+                mobility[n] += 1
+        self._blocked = prev_blocked
+        self._hash = prev_hash
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count -= 1
+        return self._geometry.coords[idx]
+
+    def canonical(self):
+        """Return the canonical form of the current game state under the
+        rotations and reflections of the board, and the symmetry that maps
+        this board onto it.
+
+        Equivalent positions (e.g., the four corner openings) all have the
+        same canonical form, so it can be used as the key for opening books
+        or caches that should treat symmetric positions as one.
+
+        Returns
+        -------
+        (isolation.Board, int)
+            A copy of the board transformed into its canonical orientation,
+            and the index of the symmetry used. Pass the index to
+            transform_move() to map moves between the two boards.
+        """
+        symmetries = self._geometry.symmetries
+        keys = [self._symmetry_key(perm) for perm in symmetries]
+        transform = keys.index(min(keys))
+        return self._transformed(symmetries[transform]), transform
+
+    def transform_move(self, move, transform, inverse=False):
+        """Map a move (row, column) through one of the board symmetries.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) on the board.
+
+        transform : int
+            The index of a symmetry, as returned by canonical().
+
+        inverse : bool (optional)
+            If True, apply the inverse symmetry (e.g., to map a move on the
+            canonical board back onto this board).
+
+        Returns
+        -------
+        (int, int)
+            The transformed coordinate pair (row, column).
+        """
+        geometry = self._geometry
+        if inverse:
+            transform = geometry.inverse_symmetries[transform]
+        idx = move[0] + move[1] * self.height
+        return geometry.coords[geometry.symmetries[transform][idx]]
+
+    def reachable_spaces(self, player):
+        """Return the list of open cells that the specified player could
+        still reach through any sequence of knight moves over open cells,
+        ignoring the opponent's future moves.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        Returns
+        -------
+        list<(int, int)>
+            The coordinate pairs (row, column) of the reachable cells.
+        """
+        coords = self._geometry.coords
+        idx = self._location_index(player)
+        return [coords[i] for i in iter_bits(self._reachable_mask(idx))]
+
+    def is_partitioned(self):
+        """Test whether the two players can no longer interfere with each
+        other, i.e., both have been placed and the sets of cells they can
+        still reach are disjoint. From then on, the game reduces to each
+        player's longest knight path in their own region.
+        """
+        if self._p1_loc is Board.NOT_MOVED or self._p2_loc is Board.NOT_MOVED:
+            return False
+        return not (self._reachable_mask(self._p1_loc) &
+                    self._reachable_mask(self._p2_loc))
+
+    def symmetric_moves(self):
+        """Return one representative legal move for the active player from
+        every class of moves that lead to equivalent positions.
+
+        Moves are equivalent when a rotation or reflection that leaves the
+        current position unchanged maps one onto the other. If the position
+        has no such symmetry, this is the same as get_legal_moves().
+
+        Returns
+        -------
+        list<(int, int)>
+            The legal moves of the active player, reduced by symmetry, in
+            the order they appear in get_legal_moves().
+        """
+        legal_moves = self.get_legal_moves()
+        key = self._symmetry_key(self._geometry.symmetries[0])
+        stabilizer = [perm for perm in self._geometry.symmetries[1:]
+                      if self._symmetry_key(perm) == key]
+        if not stabilizer:
+            return legal_moves
+        representatives = []
+        equivalent = set()
+        for move in legal_moves:
+            idx = move[0] + move[1] * self.height
+            if idx not in equivalent:
+                representatives.append(move)
+                equivalent.update(perm[idx] for perm in stabilizer)
+        return representatives
+
     def is_winner(self, player):
         """ Test whether the specified player has won the game. """
-        return player == self._inactive_player and not self.get_legal_moves(self._active_player)
+        return player == self._inactive_player and not self._active_can_move()
 
     def is_loser(self, player):
         """ Test whether the specified player has lost the game. """
-        return player == self._active_player and not self.get_legal_moves(self._active_player)
+        return player == self._active_player and not self._active_can_move()
 
     def utility(self, player):
         """Returns the utility of the current game state from the perspective
@@ -237,7 +695,7 @@ class Board(object):
             a value of -inf if the player has lost, and a value of 0
             otherwise.
         """
-        if not self.get_legal_moves(self._active_player):
+        if not self._active_can_move():
 
             if player == self._inactive_player:
                 return float("inf")
@@ -247,19 +705,93 @@ class Board(object):
 
         return 0.
 
-    def __get_moves(self, loc):
+    def _symmetry_key(self, perm):
+        """Return a sortable key for the state mapped through the cell index
+        permutation `perm` (initiative is unchanged by symmetries).
+        """
+        blocked = 0
+        for idx in iter_bits(self._blocked):
+            blocked |= 1 << perm[idx]
+        return (blocked,
+                -1 if self._p1_loc is Board.NOT_MOVED else perm[self._p1_loc],
+                -1 if self._p2_loc is Board.NOT_MOVED else perm[self._p2_loc])
+
+    def _transformed(self, perm):
+        """Return a copy of the board mapped through the cell index
+        permutation `perm`.
+        """
+        new_board = self.copy()
+        new_board._blocked, p1_loc, p2_loc = self._symmetry_key(perm)
+        new_board._p1_loc = Board.NOT_MOVED if p1_loc < 0 else p1_loc
+        new_board._p2_loc = Board.NOT_MOVED if p2_loc < 0 else p2_loc
+        if self._mobility is not None:
+            for idx, count in enumerate(self._mobility):
+                new_board._mobility[perm[idx]] = count
+        new_board._hash = new_board._full_hash()
+        return new_board
+
+    def _full_hash(self):
+        """Compute the Zobrist hash of the state from scratch."""
+        geometry = self._geometry
+        h = geometry.side_key if self._initiative else 0
+        for idx in iter_bits(self._blocked):
+            h ^= geometry.cell_keys[idx]
+        if self._p1_loc is not Board.NOT_MOVED:
+            h ^= geometry.p1_keys[self._p1_loc]
+        if self._p2_loc is not Board.NOT_MOVED:
+            h ^= geometry.p2_keys[self._p2_loc]
+        return h
+
+    def _location_index(self, player):
+        """Return the cell index of the specified player, or NOT_MOVED."""
+        if player == self._player_1:
+            return self._p1_loc
+        elif player == self._player_2:
+            return self._p2_loc
+        raise RuntimeError(
+            "Invalid player in get_player_location: {}".format(player))
+
+    def _open_mask(self):
+        """Return the bitmask of cells that are still available."""
+        return self._geometry.full_mask & ~self._blocked
+
+    def _move_mask(self, idx):
+        """Return the bitmask of cells reachable with one knight move from
+        the cell index `idx` (any open cell if the player has not moved).
+        """
+        if idx is Board.NOT_MOVED:
+            return self._open_mask()
+        return self._geometry.move_masks[idx] & ~self._blocked
+
+    def _reachable_mask(self, idx, open_mask=None):
+        """Return the bitmask of cells in `open_mask` (by default, all open
+        cells) reachable from the cell index `idx` by knight moves.
+        """
+        if open_mask is None:
+            open_mask = self._open_mask()
+        if idx is Board.NOT_MOVED:
+            return open_mask
+        return flood_fill(self._geometry.move_masks, idx, open_mask)
+
+    def _active_can_move(self):
+        """Test whether the active player has at least one legal move."""
+        return bool(self._move_mask(
+            self._p2_loc if self._initiative else self._p1_loc))
+
+    def __get_moves(self, idx):
         """Generate the list of possible moves for an L-shaped motion (like a
-        knight in chess).
+        knight in chess) from the cell index `idx`.
         """
-        if loc == Board.NOT_MOVED:
+        if idx is Board.NOT_MOVED:
             return self.get_blank_spaces()
 
-        r, c = loc
-        directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                      (1, -2), (1, 2), (2, -1), (2, 1)]
-        valid_moves = [(r + dr, c + dc) for dr, dc in directions
-                       if self.move_is_legal((r + dr, c + dc))]
-        random.shuffle(valid_moves)
+        blocked = self._blocked
+        valid_moves = [move for bit, move in self._geometry.neighbors[idx]
+                       if not blocked & bit]
+        if self._move_order == Board.SHUFFLED:
+            self._rng.shuffle(valid_moves)
+        elif self._move_order != Board.DETERMINISTIC:
+            valid_moves = self._move_order(valid_moves)
         return valid_moves
 
     def print_board(self):
@@ -271,8 +803,8 @@ class Board(object):
         the location of each player and indicating which cells have been
         blocked, and which remain open.
         """
-        p1_loc = self._board_state[-1]
-        p2_loc = self._board_state[-2]
+        p1_loc = self._p1_loc
+        p2_loc = self._p2_loc
 
         col_margin = len(str(self.height - 1)) + 1
         prefix = "{:<" + "{}".format(col_margin) + "}"
@@ -282,7 +814,7 @@ class Board(object):
             out += prefix.format(i) + ' | '
             for j in range(self.width):
                 idx = i + j * self.height
-                if not self._board_state[idx]:
+                if not self._blocked >> idx & 1:
                     out += ' '
                 elif p1_loc == idx:
                     out += symbols[0]
@@ -295,7 +827,7 @@ class Board(object):
 
         return out
 
-    def play(self, time_limit=TIME_LIMIT_MILLIS):
+    def play(self, time_limit=TIME_LIMIT_MILLIS, game_time=None):
         """Execute a match between the players by alternately soliciting them
         to select a move and applying it in the game.
 
@@ -305,6 +837,11 @@ class Board(object):
             The maximum number of milliseconds to allow before timeout
             during each turn.
 
+        game_time : numeric (optional)
+            Play with a chess clock instead of a time limit per move: each
+            player has `game_time` milliseconds for all of their moves, so
+            time saved on one move can be spent on later ones.
+
         Returns
         ----------
         (player, list<[(int, int),]>, str)
@@ -313,18 +850,33 @@ class Board(object):
             (e.g., timeout or invalid move).
         """
         move_history = []
-
-        time_millis = lambda: 1000 * timeit.default_timer()
+        # Time left on the chess clock of player 1 and player 2
+        clocks = [game_time, game_time]
 
         while True:
 
             legal_player_moves = self.get_legal_moves()
             game_copy = self.copy()
 
-            move_start = time_millis()
-            time_left = lambda : time_limit - (time_millis() - move_start)
+            # Players may use the opponent's turn, e.g. to ponder
+            waiting_player = self._inactive_player
+            turn_started = getattr(waiting_player, "opponent_turn_started", None)
+            if turn_started is not None:
+                turn_started(self.copy())
+
+            if game_time is None:
+                move_time = time_limit
+            else:
+                move_time = clocks[self._initiative]
+            time_left = Deadline(move_time, per_move=game_time is None)
             curr_move = self._active_player.get_move(game_copy, time_left)
             move_end = time_left()
+            if game_time is not None:
+                clocks[self._initiative] -= move_time - move_end
+
+            turn_ended = getattr(waiting_player, "opponent_turn_ended", None)
+            if turn_ended is not None:
+                turn_ended(curr_move)
 
             if curr_move is None:
                 curr_move = Board.NOT_MOVED
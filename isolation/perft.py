@@ -0,0 +1,146 @@
+"""
+This file contains tools to prove that a `Board` implementation follows the
+rules of Isolation: `perft()` counts the leaf nodes of the game tree to a
+fixed depth (and measures move generation speed), and `differential()` plays
+seeded random games on a candidate implementation and on the original
+list-based `isolation.reference.Board`, comparing them at every ply.
+
+Any change to the engine should leave both unchanged; from the command line:
+
+    python -m isolation.perft --depth 4 --games 200
+"""
+import argparse
+import random
+import timeit
+
+from .isolation import Board
+from .reference import Board as ReferenceBoard
+
+# Known perft counts from the empty board, by board size and depth
+PERFT_COUNTS = {
+    (5, 5): (1, 25, 600, 2208, 7712, 24160, 73248, 190528, 475040),
+    (7, 7): (1, 49, 2352, 11280, 52672, 232416, 999456),
+}
+
+
+def perft(board, depth):
+    """Return the number of move sequences of exactly `depth` plies from
+    `board` (games that end sooner are not counted).
+
+    Works with any implementation of the `Board` interface; boards with
+    push_move()/pop_move() are searched in place, and the last ply is
+    counted with count_legal_moves() where available.
+    """
+    if depth == 0:
+        return 1
+    if depth == 1 and hasattr(board, "count_legal_moves"):
+        return board.count_legal_moves()
+    moves = board.get_legal_moves()
+    if depth == 1:
+        return len(moves)
+    count = 0
+    if hasattr(board, "push_move"):
+        for move in moves:
+            board.push_move(move)
+            count += perft(board, depth - 1)
+            board.pop_move()
+    else:
+        for move in moves:
+            count += perft(board.forecast_move(move), depth - 1)
+    return count
+
+
+def perft_rate(board, depth):
+    """Return the perft count of `board` to `depth` and the number of leaf
+    nodes counted per second.
+    """
+    start = timeit.default_timer()
+    count = perft(board, depth)
+    elapsed = timeit.default_timer() - start
+    return count, count / elapsed if elapsed > 0 else float("inf")
+
+
+def differential(candidate=Board, reference=ReferenceBoard, num_games=100,
+                 width=7, height=7, seed=0):
+    """Play `num_games` seeded random games on boards of the `candidate` and
+    `reference` classes, and raise an AssertionError at the first ply where
+    they disagree on the legal moves (of either player; order is ignored),
+    player locations, blank spaces, winner, loser, utility or to_string().
+
+    Returns the number of plies compared.
+    """
+    rng = random.Random(seed)
+    players = ("Player1", "Player2")
+    plies = 0
+    for game_index in range(num_games):
+        boards = (candidate(players[0], players[1], width, height),
+                  reference(players[0], players[1], width, height))
+        moves = []
+        while True:
+            states = [_observe(board, players) for board in boards]
+            if states[0] != states[1]:
+                field = next(name for name in states[0]
+                             if states[0][name] != states[1][name])
+                raise AssertionError(
+                    "Game {} after moves {}: {} differs ({!r} != {!r})".format(
+                        game_index, moves, field, states[0][field],
+                        states[1][field]))
+            plies += 1
+            legal_moves = states[0]["legal_moves"]
+            if not legal_moves:
+                break
+            move = rng.choice(legal_moves)
+            moves.append(move)
+            for board in boards:
+                board.apply_move(move)
+    return plies
+
+
+def _observe(board, players):
+    """Return everything the rules say about the state of `board`."""
+    state = {"legal_moves": sorted(board.get_legal_moves()),
+             "blank_spaces": sorted(board.get_blank_spaces()),
+             "active_player": board.active_player,
+             "move_count": board.move_count,
+             "to_string": board.to_string()}
+    for player in players:
+        state["legal_moves " + player] = sorted(board.get_legal_moves(player))
+        state["location " + player] = board.get_player_location(player)
+        state["is_winner " + player] = board.is_winner(player)
+        state["is_loser " + player] = board.is_loser(player)
+        state["utility " + player] = board.utility(player)
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Count perft nodes and compare Board with the reference.")
+    parser.add_argument("--depth", type=int, default=4,
+                        help="perft depth from the empty board")
+    parser.add_argument("--games", type=int, default=100,
+                        help="number of random games to compare")
+    parser.add_argument("--width", type=int, default=7)
+    parser.add_argument("--height", type=int, default=7)
+    args = parser.parse_args()
+    size = (args.width, args.height)
+
+    known = PERFT_COUNTS.get(size, ())
+    boards = (("Board", Board("Player1", "Player2", *size,
+                              move_order=Board.DETERMINISTIC)),
+              ("reference", ReferenceBoard("Player1", "Player2", *size)))
+    for name, board in boards:
+        count, rate = perft_rate(board, args.depth)
+        status = ""
+        if args.depth < len(known):
+            status = " ok" if count == known[args.depth] else \
+                " MISMATCH (expected {})".format(known[args.depth])
+        print("perft({}) {} {}x{}: {} nodes, {:,.0f} nodes/sec{}".format(
+            args.depth, name, args.width, args.height, count, rate, status))
+    plies = differential(num_games=args.games, width=args.width,
+                         height=args.height)
+    print("Board matches the reference over {} games ({} plies)".format(
+        args.games, plies))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+This file contains a compact binary format for recorded games of Isolation
+and the `GameArchive` class, an append-only file of game records with an
+index that allows any game to be read in constant time through `mmap`.
+
+Each record is a fixed-width header (board size, winner, termination reason,
+move count and player names) followed by one byte per move. Games can be
+exported in the JSON shape expected by `isoviz/display.html` with
+`export_isoviz()`, or from the command line:
+
+    python -m isolation.records games.isoa 0 5 7 > games.json
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+
+from collections import namedtuple
+
+MAGIC = b"ISOGAME1"
+TERMINATIONS = ("", "timeout", "forfeit", "illegal move")
+NO_WINNER = 255
+NAME_SIZE = 16
+
+_HEADER = struct.Struct("<BBBBH{0}s{0}s".format(NAME_SIZE))
+_OFFSET = struct.Struct("<Q")
+
+
+class GameRecord(namedtuple("GameRecord", ["width", "height", "players",
+                                           "winner", "termination", "moves"])):
+    """A complete game of Isolation.
+
+    Attributes
+    ----------
+    width, height : int
+        The size of the board.
+
+    players : (str, str)
+        The names of player 1 and player 2 (at most 16 bytes are stored).
+
+    winner : int or None
+        0 if player 1 won, 1 if player 2 won, or None if unknown.
+
+    termination : str
+        The reason the loser lost, as returned by `Board.play()` ("timeout",
+        "forfeit" or "illegal move"), or "" if unknown.
+
+    moves : list<(int, int)>
+        Every move of the game, including the initial placements, as
+        coordinate pairs (row, column).
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_play(cls, game, names, opening, result):
+        """Build a record from the outcome of `Board.play()`.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            The board the game was played on.
+
+        names : (str, str)
+            The names of player 1 and player 2.
+
+        opening : list<(int, int)>
+            Moves applied to the board before `play()` was called.
+
+        result : (object, list<[int, int]>, str)
+            The (winner, move_history, termination) tuple from `play()`.
+        """
+        winner, history, termination = result
+        return cls(game.width, game.height, tuple(names),
+                   0 if winner is game._player_1 else 1, termination,
+                   [tuple(move) for move in opening] +
+                   [tuple(move) for move in history])
+
+    def to_isoviz(self):
+        """Return the game as the dictionary used by isoviz/display.html."""
+        return {"player1": self.players[0], "player2": self.players[1],
+                "moves": [list(move) for move in self.moves]}
+
+
+def encode_record(record):
+    """Return the binary encoding of a `GameRecord`."""
+    if record.width * record.height > 255:
+        raise ValueError("Boards with more than 255 cells cannot be encoded.")
+    header = _HEADER.pack(
+        record.width, record.height,
+        NO_WINNER if record.winner is None else record.winner,
+        TERMINATIONS.index(record.termination), len(record.moves),
+        record.players[0].encode("utf-8")[:NAME_SIZE],
+        record.players[1].encode("utf-8")[:NAME_SIZE])
+    return header + bytes(r + c * record.height for r, c in record.moves)
+
+
+def decode_record(buffer, offset=0):
+    """Decode the `GameRecord` stored at `offset` in `buffer`."""
+    (width, height, winner, termination, num_moves,
+     name_1, name_2) = _HEADER.unpack_from(buffer, offset)
+    start = offset + _HEADER.size
+    moves = [(idx % height, idx // height)
+             for idx in buffer[start:start + num_moves]]
+    players = (name_1.rstrip(b"\0").decode("utf-8", "replace"),
+               name_2.rstrip(b"\0").decode("utf-8", "replace"))
+    return GameRecord(width, height, players,
+                      None if winner == NO_WINNER else winner,
+                      TERMINATIONS[termination], moves)
+
+
+class GameArchive(object):
+    """An append-only file of encoded game records.
+
+    The records are stored in the file at `path`, and the byte offset of
+    every record is stored as a fixed-width integer in `path + ".idx"`. Both
+    files are read through `mmap`, so fetching game `i` reads one index
+    entry and one record regardless of the size of the archive.
+
+    Parameters
+    ----------
+    path : str
+        The path of the archive file; it is created if it does not exist.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + ".idx"
+        if not os.path.exists(path):
+            with open(path, "wb") as data:
+                data.write(MAGIC)
+            open(self.index_path, "wb").close()
+        with open(path, "rb") as data:
+            if data.read(len(MAGIC)) != MAGIC:
+                raise ValueError("{} is not a game archive.".format(path))
+        self._data = self._index = None
+        self._data_map = self._index_map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return os.path.getsize(self.index_path) // _OFFSET.size
+
+    def __getitem__(self, i):
+        num_games = len(self)
+        if i < 0:
+            i += num_games
+        if not 0 <= i < num_games:
+            raise IndexError("game index out of range")
+        if self._index_map is None or len(self._index_map) <= i * _OFFSET.size:
+            self._remap()
+        offset, = _OFFSET.unpack_from(self._index_map, i * _OFFSET.size)
+        return decode_record(self._data_map, offset)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, record):
+        """Append a `GameRecord` to the archive and return its index."""
+        encoded = encode_record(record)
+        with open(self.path, "ab") as data:
+            offset = data.tell()
+            data.write(encoded)
+        with open(self.index_path, "ab") as index:
+            index.write(_OFFSET.pack(offset))
+            return index.tell() // _OFFSET.size - 1
+
+    def close(self):
+        """Release the memory maps of the archive files."""
+        for handle in (self._data_map, self._index_map, self._data, self._index):
+            if handle is not None:
+                handle.close()
+        self._data = self._index = None
+        self._data_map = self._index_map = None
+
+    def _remap(self):
+        """(Re)map both files after records have been appended."""
+        self.close()
+        self._data = open(self.path, "rb")
+        self._index = open(self.index_path, "rb")
+        self._data_map = mmap.mmap(self._data.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+        self._index_map = mmap.mmap(self._index.fileno(), 0,
+                                    access=mmap.ACCESS_READ)
+
+
+def export_isoviz(archive, indices, out):
+    """Stream the selected games of `archive` to the text file `out` as a
+    JSON array of {"player1", "player2", "moves"} objects, the fields of the
+    isoviz/display.html form. Games are read and written one at a time.
+    """
+    out.write("[")
+    for n, i in enumerate(indices):
+        out.write(",\n" if n else "\n")
+        json.dump(archive[i].to_isoviz(), out)
+    out.write("\n]\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export games from an archive for isoviz/display.html.")
+    parser.add_argument("archive", help="path of the game archive")
+    parser.add_argument("games", nargs="*", type=int,
+                        help="indices of the games to export (default: all)")
+    args = parser.parse_args()
+
+    with GameArchive(args.archive) as archive:
+        export_isoviz(archive, args.games or range(len(archive)), sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,14 @@ own agent and example heuristic functions.
     ************************************************************************
 """
 
+from collections import namedtuple
 from random import randint
 
+from isolation.isolation import popcount
+
+Territory = namedtuple("Territory", ["own_reachable", "opp_reachable",
+                                     "own_first", "opp_first"])
+
 
 def null_score(game, player):
     """This heuristic presumes no knowledge for non-terminal states, and
@@ -39,6 +45,21 @@ def null_score(game, player):
     return 0.
 
 
+def child_moves(game, player, moves):
+    """Return the number of legal moves of `player` and of their opponent
+    after each of the active player's `moves`, and the utility for `player`
+    of the children where the player to move next is blocked (+inf if
+    `player` is the active player, -inf otherwise).
+
+    Batched score functions (see `GreedyPlayer`) build on these counts
+    instead of calling the score function on every child board.
+    """
+    mover, waiting = game.count_child_moves(moves)
+    if player == game.active_player:
+        return mover, waiting, float("inf")
+    return waiting, mover, float("-inf")
+
+
 def open_move_score(game, player):
     """The basic evaluation function described in lecture that outputs a score
     equal to the number of moves open for your computer player on the board.
@@ -65,7 +86,18 @@ def open_move_score(game, player):
     if game.is_winner(player):
         return float("inf")
 
-    return float(len(game.get_legal_moves(player)))
+    return float(game.count_legal_moves(player))
+
+
+def _open_move_score_children(game, player, moves):
+    """Return open_move_score for each child of `game` reached by `moves`."""
+    own, opp, utility = child_moves(game, player, moves)
+    ended = opp if utility > 0 else own
+    return [utility if not end else float(count)
+            for count, end in zip(own, ended)]
+
+
+open_move_score.score_children = _open_move_score_children
 
 
 def improved_score(game, player):
@@ -95,11 +127,22 @@ def improved_score(game, player):
     if game.is_winner(player):
         return float("inf")
 
-    own_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    own_moves = game.count_legal_moves(player)
+    opp_moves = game.count_legal_moves(game.get_opponent(player))
     return float(own_moves - opp_moves)
 
 
+def _improved_score_children(game, player, moves):
+    """Return improved_score for each child of `game` reached by `moves`."""
+    own, opp, utility = child_moves(game, player, moves)
+    ended = opp if utility > 0 else own
+    return [utility if not end else float(own_moves - opp_moves)
+            for own_moves, opp_moves, end in zip(own, opp, ended)]
+
+
+improved_score.score_children = _improved_score_children
+
+
 def center_score(game, player):
     """Outputs a score equal to square of the distance from the center of the
     board to the position of the player.
@@ -133,6 +176,110 @@ def center_score(game, player):
     return float((h - y)**2 + (w - x)**2)
 
 
+def _center_score_children(game, player, moves):
+    """Return center_score for each child of `game` reached by `moves`."""
+    own, opp, utility = child_moves(game, player, moves)
+    ended = opp if utility > 0 else own
+    if utility > 0:
+        locations = moves
+    else:
+        locations = [game.get_player_location(player)] * len(moves)
+    w, h = game.width / 2., game.height / 2.
+    return [utility if not end else float((h - y)**2 + (w - x)**2)
+            for (y, x), end in zip(locations, ended)]
+
+
+center_score.score_children = _center_score_children
+
+
+def territory(game, player, max_depth=None):
+    """Run a simultaneous breadth-first search of knight moves from both
+    players over the open cells of the board, and count the cells each side
+    can reach and the cells each side reaches strictly before the other
+    (a Voronoi partition of the board by knight distance).
+
+    Frontiers are bitmasks, so each BFS layer costs eight shifts whatever
+    the number of cells in the frontier. Cells both players reach at the
+    same distance count as reachable for both, but as first-to-reach for
+    neither.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        An instance of `isolation.Board` encoding the current state of the
+        game (e.g., player locations and blocked cells).
+
+    player : hashable
+        One of the objects registered by the game object as a valid player.
+        (i.e., `player` should be either game.__player_1__ or
+        game.__player_2__).
+
+    max_depth : int (optional)
+        Stop the search after this many knight moves (BFS layers). A small
+        depth (e.g., 2 or 3) is cheap enough to run at every leaf node of a
+        search; None searches until both frontiers are empty.
+
+    Returns
+    ----------
+    Territory
+        A namedtuple (own_reachable, opp_reachable, own_first, opp_first)
+        of cell counts for `player` and their opponent.
+    """
+    knight_step = game._geometry.knight_step
+    open_mask = game._open_mask()
+
+    own_front = game._move_mask(game._location_index(player))
+    opp_front = game._move_mask(game._location_index(game.get_opponent(player)))
+    own_reach = opp_reach = claimed = own_first = opp_first = 0
+    depth = 0
+    while own_front or opp_front:
+        depth += 1
+        own_first |= own_front & ~opp_front & ~claimed
+        opp_first |= opp_front & ~own_front & ~claimed
+        claimed |= own_front | opp_front
+        own_reach |= own_front
+        opp_reach |= opp_front
+        if max_depth is not None and depth >= max_depth:
+            break
+        own_front = knight_step(own_front) & open_mask & ~own_reach
+        opp_front = knight_step(opp_front) & open_mask & ~opp_reach
+
+    return Territory(popcount(own_reach), popcount(opp_reach),
+                     popcount(own_first), popcount(opp_first))
+
+
+def territory_score(game, player, max_depth=3):
+    """Outputs a score equal to the difference in the number of cells each
+    player can reach before the other within `max_depth` knight moves, plus
+    the difference in the number of reachable cells as a tie-breaker.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        An instance of `isolation.Board` encoding the current state of the
+        game (e.g., player locations and blocked cells).
+
+    player : hashable
+        One of the objects registered by the game object as a valid player.
+        (i.e., `player` should be either game.__player_1__ or
+        game.__player_2__).
+
+    Returns
+    ----------
+    float
+        The heuristic value of the current game state
+    """
+    if game.is_loser(player):
+        return float("-inf")
+
+    if game.is_winner(player):
+        return float("inf")
+
+    own_reach, opp_reach, own_first, opp_first = territory(game, player,
+                                                           max_depth)
+    return float(own_first - opp_first) + 0.1 * (own_reach - opp_reach)
+
+
 class RandomPlayer():
     """Player that chooses a move randomly."""
 
@@ -165,6 +312,9 @@ class RandomPlayer():
 class GreedyPlayer():
     """Player that chooses next move to maximize heuristic score. This is
     equivalent to a minimax search agent with a search depth of one.
+
+    If the score function has a `score_children(game, player, moves)`
+    attribute, it is used to score all the moves in one call.
     """
 
     def __init__(self, score_fn=open_move_score):
@@ -195,7 +345,13 @@ class GreedyPlayer():
         legal_moves = game.get_legal_moves()
         if not legal_moves:
             return (-1, -1)
-        _, move = max([(self.score(game.forecast_move(m), self), m) for m in legal_moves])
+        score_children = getattr(self.score, "score_children", None)
+        if score_children is not None:
+            # Score every child at once without building the boards
+            scores = score_children(game, self, legal_moves)
+        else:
+            scores = [self.score(game.forecast_move(m), self) for m in legal_moves]
+        _, move = max(zip(scores, legal_moves))
         return move
 
 
@@ -18,31 +18,43 @@ import warnings
 from collections import namedtuple
 
 from isolation import Board
+from isolation.records import GameArchive, GameRecord
 from sample_players import (RandomPlayer, open_move_score,
                             improved_score, center_score)
-from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
-                        custom_score_2, custom_score_3)
+from game_agent import (MinimaxPlayer, AlphaBetaPlayer, MCTSPlayer,
+                        custom_score, custom_score_2, custom_score_3)
 
 NUM_MATCHES = 5  # number of matches against each opponent
 TIME_LIMIT = 150  # number of milliseconds before timeout
+GAME_ARCHIVE = None  # path of an isolation.records archive to save games to
+PERCENTILES = (50, 90)  # percentiles of the per-move search statistics
+# Search features of the enhanced-search test agents; the other test agents
+# keep the search of the cpu agents, so that their heuristics are compared
+# with AB_Improved like for like
+SEARCH_OPTIONS = dict(time_management=True, endgame_solver=True,
+                      move_ordering=True)
 
 DESCRIPTION = """
 This script evaluates the performance of the custom_score evaluation
 function against a baseline agent using alpha-beta search and iterative
 deepening (ID) called `AB_Improved`. The three `AB_Custom` agents use
 ID and alpha-beta search with the custom_score functions defined in
-game_agent.py.
+game_agent.py. AB_Improved_Search and AB_Custom_PVS add the enhanced
+search features (time management, endgame solver, move ordering).
 """
 
 Agent = namedtuple("Agent", ["player", "name"])
 
 
-def play_round(cpu_agent, test_agents, win_counts, num_matches):
+def play_round(cpu_agent, test_agents, win_counts, num_matches, archive=None):
     """Compare the test agents to the cpu agent in "fair" matches.
 
     "Fair" matches use random starting locations and force the agents to
     play as both first and second player to control for advantages resulting
     from choosing better opening moves or having first initiative to move.
+
+    If `archive` is an `isolation.records.GameArchive`, every game played is
+    appended to it.
     """
     timeout_count = 0
     forfeit_count = 0
@@ -51,18 +63,26 @@ def play_round(cpu_agent, test_agents, win_counts, num_matches):
         games = sum([[Board(cpu_agent.player, agent.player),
                       Board(agent.player, cpu_agent.player)]
                     for agent in test_agents], [])
+        names = sum([[(cpu_agent.name, agent.name), (agent.name, cpu_agent.name)]
+                     for agent in test_agents], [])
 
         # initialize all games with a random move and response
+        opening = []
         for _ in range(2):
             move = random.choice(games[0].get_legal_moves())
+            opening.append(move)
             for game in games:
                 game.apply_move(move)
 
         # play all games and tally the results
-        for game in games:
-            winner, _, termination = game.play(time_limit=TIME_LIMIT)
+        for game, game_names in zip(games, names):
+            result = game.play(time_limit=TIME_LIMIT)
+            winner, _, termination = result
             win_counts[winner] += 1
 
+            if archive is not None:
+                archive.append(GameRecord.from_play(game, game_names, opening, result))
+
             if termination == "timeout":
                 timeout_count += 1
             elif termination == "forfeit":
@@ -77,7 +97,33 @@ def update(total_wins, wins):
     return total_wins
 
 
-def play_matches(cpu_agents, test_agents, num_matches):
+def percentile(values, q):
+    """Return the q-th percentile of a list of numbers (nearest rank)."""
+    values = sorted(values)
+    return values[max(0, -(-q * len(values) // 100) - 1)]
+
+
+def print_search_stats(agents):
+    """Print the mean and percentiles of the per-move search statistics
+    (see `game_agent.SearchStats`) recorded by each agent during the
+    tournament.
+    """
+    print("\n{:^13}{:^14}{:>12}".format("Agent", "Per move", "Mean") +
+          ''.join(['{:>12}'.format("p{}".format(q)) for q in PERCENTILES]))
+    for agent in agents:
+        move_stats = getattr(agent.player, "move_stats", None)
+        if not move_stats:
+            continue
+        for index, field in enumerate(move_stats[0]._fields):
+            values = [getattr(stats, field) for stats in move_stats]
+            print("{:^13}{:^14}{:>12.1f}".format(
+                agent.name if index == 0 else "", field,
+                sum(values) / len(values)) +
+                ''.join(['{:>12.1f}'.format(percentile(values, q))
+                         for q in PERCENTILES]))
+
+
+def play_matches(cpu_agents, test_agents, num_matches, archive=None):
     """Play matches between the test agent and each cpu_agent individually. """
     total_wins = {agent.player: 0 for agent in test_agents}
     total_timeouts = 0.
@@ -93,7 +139,7 @@ def play_matches(cpu_agents, test_agents, num_matches):
 
         print("{!s:^9}{:^13}".format(idx + 1, agent.name), end="", flush=True)
 
-        counts = play_round(agent, test_agents, wins, num_matches)
+        counts = play_round(agent, test_agents, wins, num_matches, archive)
         total_timeouts += counts[0]
         total_forfeits += counts[1]
         total_wins = update(total_wins, wins)
@@ -113,6 +159,7 @@ def play_matches(cpu_agents, test_agents, num_matches):
                 "{:.1f}%".format(100 * total_wins[x[1].player] / total_matches)
             ) for x in enumerate(test_agents)
     ]))
+    print_search_stats(test_agents)
 
     if total_timeouts:
         print(("\nThere were {} timeouts during the tournament -- make sure " +
@@ -132,7 +179,12 @@ def main():
         Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved"),
         Agent(AlphaBetaPlayer(score_fn=custom_score), "AB_Custom"),
         Agent(AlphaBetaPlayer(score_fn=custom_score_2), "AB_Custom_2"),
-        Agent(AlphaBetaPlayer(score_fn=custom_score_3), "AB_Custom_3")
+        Agent(AlphaBetaPlayer(score_fn=custom_score_3), "AB_Custom_3"),
+        Agent(AlphaBetaPlayer(score_fn=improved_score, **SEARCH_OPTIONS),
+              "AB_Improved_Search"),
+        Agent(AlphaBetaPlayer(score_fn=custom_score, pvs=True,
+                              aspiration_window=1., **SEARCH_OPTIONS),
+              "AB_Custom_PVS")
     ]
 
     # Define a collection of agents to compete against the test agents
@@ -143,14 +195,24 @@ def main():
         Agent(MinimaxPlayer(score_fn=improved_score), "MM_Improved"),
         Agent(AlphaBetaPlayer(score_fn=open_move_score), "AB_Open"),
         Agent(AlphaBetaPlayer(score_fn=center_score), "AB_Center"),
-        Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved")
+        Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved"),
+        Agent(MCTSPlayer(), "MCTS")
     ]
 
     print(DESCRIPTION)
     print("{:^74}".format("*************************"))
     print("{:^74}".format("Playing Matches"))
     print("{:^74}".format("*************************"))
-    play_matches(cpu_agents, test_agents, NUM_MATCHES)
+    archive = GameArchive(GAME_ARCHIVE) if GAME_ARCHIVE else None
+    try:
+        play_matches(cpu_agents, test_agents, NUM_MATCHES, archive)
+    finally:
+        if archive is not None:
+            archive.close()
+        # Release the opening books and Lazy SMP helpers of the agents
+        for agent in test_agents + cpu_agents:
+            if hasattr(agent.player, "close"):
+                agent.player.close()
 
 
 if __name__ == "__main__":
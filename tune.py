@@ -0,0 +1,207 @@
+"""Tune the weights of `game_agent.WeightedScore` by self-play with SPSA
+(simultaneous perturbation stochastic approximation).
+
+Every iteration perturbs all the weights at once by +/- c_k in a random
+direction, and plays both perturbed candidates against a fixed baseline
+agent (AB_Improved, as in `tournament.py`, unless baseline weights are
+given) in "fair" matches: the same random openings for both candidates,
+each played once as the first and once as the second player. The games
+are spread over a pool of worker processes. The difference between the
+two candidates' win rates estimates the gradient of the win rate, and
+the weights take a step of size a_k along it.
+
+The tuner state is saved to a JSON checkpoint after every iteration, and a
+run given an existing checkpoint resumes from it, e.g.:
+
+    python tune.py tune.json --iterations 200 --pairs 8 --processes 8
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import time
+
+from isolation import Board
+from game_agent import AlphaBetaPlayer, WeightedScore
+from sample_players import improved_score
+
+
+class SPSATuner(object):
+    """The state of an SPSA optimization maximizing a noisy objective of a
+    weight vector, with the usual gain sequences
+
+        a_k = a / (k + 1 + A)**alpha    c_k = c / (k + 1)**gamma
+
+    Parameters
+    ----------
+    weights : sequence<float>
+        The initial weights.
+
+    a, c, A, alpha, gamma : float (optional)
+        The gain sequence parameters: `c` is the initial perturbation size
+        and `a` scales the steps.
+
+    seed : int (optional)
+        The seed of the random perturbations; iteration k draws from its
+        own generator, so a resumed run repeats the same sequence.
+    """
+
+    def __init__(self, weights, a=2., c=.5, A=10., alpha=.602, gamma=.101,
+                 seed=0):
+        self.weights = [float(weight) for weight in weights]
+        self.a = a
+        self.c = c
+        self.A = A
+        self.alpha = alpha
+        self.gamma = gamma
+        self.seed = seed
+        self.iteration = 0
+        self.history = []
+
+    def gains(self, iteration=None):
+        """Return (a_k, c_k) for an iteration (the next one if None)."""
+        k = self.iteration if iteration is None else iteration
+        return (self.a / (k + 1 + self.A)**self.alpha,
+                self.c / (k + 1)**self.gamma)
+
+    def step(self, evaluate):
+        """Run one iteration and return its history entry.
+
+        Parameters
+        ----------
+        evaluate : callable
+            Called as evaluate(plus, minus, rng) with the two perturbed
+            weight vectors and the random generator of the iteration (for
+            e.g. drawing openings); returns the objective of each.
+        """
+        rng = random.Random("{}:{}".format(self.seed, self.iteration))
+        a_k, c_k = self.gains()
+        delta = [rng.choice((-1, 1)) for _ in self.weights]
+        plus = [w + c_k * d for w, d in zip(self.weights, delta)]
+        minus = [w - c_k * d for w, d in zip(self.weights, delta)]
+        plus_score, minus_score = evaluate(plus, minus, rng)
+        self.weights = [w + a_k * (plus_score - minus_score) / (2 * c_k * d)
+                        for w, d in zip(self.weights, delta)]
+        entry = {"iteration": self.iteration, "plus": plus_score,
+                 "minus": minus_score, "weights": list(self.weights)}
+        self.history.append(entry)
+        self.iteration += 1
+        return entry
+
+    def save(self, path):
+        """Write the state to a JSON checkpoint, atomically replacing
+        `path`."""
+        state = dict(vars(self))
+        with open(path + ".tmp", "w") as checkpoint:
+            json.dump(state, checkpoint, indent=1)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path):
+        """Return the tuner saved to a JSON checkpoint."""
+        with open(path) as checkpoint:
+            state = json.load(checkpoint)
+        tuner = cls(state.pop("weights"))
+        vars(tuner).update(state)
+        return tuner
+
+
+def _play_game(job):
+    """Play one game between a candidate and the baseline, and return 1 if
+    the candidate won, otherwise 0.
+    """
+    weights, baseline, opening, candidate_first, width, height, time_limit = job
+    candidate = AlphaBetaPlayer(score_fn=WeightedScore(*weights),
+                                in_place=True)
+    opponent = AlphaBetaPlayer(score_fn=improved_score if baseline is None
+                               else WeightedScore(*baseline), in_place=True)
+    players = (candidate, opponent) if candidate_first else \
+        (opponent, candidate)
+    game = Board(players[0], players[1], width, height)
+    for move in opening:
+        game.apply_move(move)
+    winner, _, _ = game.play(time_limit=time_limit)
+    return int(winner is candidate)
+
+
+def _random_opening(rng, width, height):
+    """Return a random first move and response."""
+    game = Board("Player1", "Player2", width, height,
+                 move_order=Board.DETERMINISTIC)
+    opening = []
+    for _ in range(2):
+        move = rng.choice(game.get_legal_moves())
+        opening.append(move)
+        game.apply_move(move)
+    return opening
+
+
+def tune(path, iterations=100, pairs=4, time_limit=150, processes=None,
+         baseline=None, width=7, height=7, verbose=False, **settings):
+    """Run SPSA iterations until `iterations` are done in total, resuming
+    from the checkpoint at `path` if it exists, and return the tuner.
+
+    Every iteration plays 4 * `pairs` games with `time_limit` milliseconds
+    per move on `processes` worker processes (one per CPU core if None);
+    more processes than cores would make the players time out. `baseline`
+    is the weights of the baseline agent, or None for AB_Improved. The
+    remaining keyword arguments are passed to `SPSATuner` for a new run.
+    """
+    if os.path.exists(path):
+        tuner = SPSATuner.load(path)
+    else:
+        tuner = SPSATuner(settings.pop("weights", WeightedScore().weights),
+                          **settings)
+
+    def evaluate(plus, minus, rng):
+        openings = [_random_opening(rng, width, height) for _ in range(pairs)]
+        jobs = [(weights, baseline, opening, candidate_first, width, height,
+                 time_limit)
+                for weights in (plus, minus) for opening in openings
+                for candidate_first in (True, False)]
+        results = pool.map(_play_game, jobs, chunksize=1)
+        games = len(results) // 2
+        return sum(results[:games]) / games, sum(results[games:]) / games
+
+    with multiprocessing.Pool(processes) as pool:
+        while tuner.iteration < iterations:
+            start = time.perf_counter()
+            entry = tuner.step(evaluate)
+            tuner.save(path)
+            if verbose:
+                print("Iteration {}: {:.2f} vs {:.2f} ({:.0f}s), {!r}".format(
+                    entry["iteration"], entry["plus"], entry["minus"],
+                    time.perf_counter() - start,
+                    WeightedScore(*tuner.weights)))
+    return tuner
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="path of the JSON checkpoint")
+    parser.add_argument("--iterations", type=int, default=100,
+                        help="total number of SPSA iterations")
+    parser.add_argument("--pairs", type=int, default=4,
+                        help="openings per iteration (4 games each)")
+    parser.add_argument("--time", type=int, default=150,
+                        help="time limit per move in milliseconds")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--weights", type=float, nargs=3,
+                        default=WeightedScore().weights,
+                        help="initial weights of a new run")
+    parser.add_argument("--baseline", type=float, nargs=3, default=None,
+                        help="weights of the baseline (default AB_Improved)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--width", type=int, default=7)
+    parser.add_argument("--height", type=int, default=7)
+    args = parser.parse_args()
+    tuner = tune(args.path, args.iterations, args.pairs, args.time,
+                 args.processes, args.baseline, args.width, args.height,
+                 verbose=True, weights=args.weights, seed=args.seed)
+    print("Tuned weights: {!r}".format(WeightedScore(*tuner.weights)))
+
+
+if __name__ == "__main__":
+    main()